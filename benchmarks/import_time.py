@@ -0,0 +1,50 @@
+"""
+Measures the cold import time of the project modules, each in a fresh interpreter.
+
+Run from the repository root:
+
+    python benchmarks/import_time.py [--repeat N]
+
+For each statement the median wall-clock time over the runs is reported, along with whether
+matplotlib ended up loaded. Only `plot` and `plot_many` should load it.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    'pass',
+    'import numpy',
+    'import maze',
+    'import q_learner',
+    'import main',
+    'import matplotlib.pyplot',
+]
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, 'matplotlib' in sys.modules)
+'''
+
+def measure(statement, repeat):
+    """Returns the median import time in seconds of `statement` and whether it loads matplotlib."""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(output[0]))
+    return statistics.median(times), output[1] == 'True'
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat",help='Number of fresh interpreters per statement',type=int,default=5)
+    args = parser.parse_args()
+    for statement in STATEMENTS:
+        seconds, matplotlib_loaded = measure(statement, args.repeat)
+        print(f"{statement:<28}{seconds*1000:8.1f} ms   matplotlib loaded: {matplotlib_loaded}")
@@ -0,0 +1,371 @@
+"""
+Binary storage of maze samples.
+
+Maze record (Maze.to_bytes), little-endian:
+
+    offset  size  field
+    0       2     lines (uint16)
+    2       2     columns (uint16)
+    4       4     seed of the run (uint32, 0xFFFFFFFF if unknown)
+    8       4     index of the sample (uint32, 0xFFFFFFFF if unknown)
+    12      12    start, finish and prize cells, (x, y) pairs of uint16 (0xFFFF, 0xFFFF if unset)
+    24      n     walls: ceil(lines*columns / 2) bytes
+
+The walls are the wall bitmasks of the cells (NORTH=1, SOUTH=2, EAST=4, WEST=8, see Maze.wall_grid) in
+row-major order, one nibble per cell, the even cell in the low nibble and the odd cell in the high one.
+A 10x8 maze takes 24 + 40 = 64 bytes.
+
+Container file:
+
+    offset  size  field
+    0       4     magic b'MAZE'
+    4       2     version (uint16, 1)
+    6       2     reserved (0)
+    8       8     number of records (uint64)
+    16      8     offset of the index (uint64)
+    24      ...   the records, back to back
+    index   8*n   the offset of every record from the start of the file (uint64)
+
+The index is written last, so a container can be filled from a stream of unknown length. When all the
+records have the same size, they form a regular array that is read in one pass (see load_wall_grids)
+or memory-mapped for random access (see MazeDataset).
+"""
+import struct
+import numpy as np
+from maze import Maze, RECORD_HEADER
+
+MAGIC = b'MAZE'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHHQQ')
+
+def record_size(lines, columns):
+    """
+    Returns the size in bytes of the record of a lines x columns maze.
+    """
+    return RECORD_HEADER.size + (lines*columns + 1) // 2
+
+def record_dtype(lines, columns):
+    """
+    Returns the structured dtype of the record of a lines x columns maze, matching RECORD_HEADER.
+    """
+    return np.dtype([('lines', '<u2'), ('columns', '<u2'), ('seed', '<u4'), ('index', '<u4'),
+                     ('start', '<u2', (2,)), ('finish', '<u2', (2,)), ('prize', '<u2', (2,)),
+                     ('walls', 'u1', ((lines*columns + 1) // 2,))])
+
+def unpack_walls(packed, lines, columns):
+    """
+    Decodes wall nibbles into wall bitmasks.
+
+    Parameters:
+    -----------
+    packed : numpy.ndarray
+        A (..., ceil(lines*columns / 2)) uint8 array of wall nibbles.
+    lines : int
+        The number of lines of the mazes.
+    columns : int
+        The number of columns of the mazes.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (..., lines, columns) uint8 array of wall bitmasks.
+    """
+    cells = np.empty(packed.shape[:-1] + (2*packed.shape[-1],), dtype=np.uint8)
+    cells[..., 0::2] = packed & 0x0F
+    cells[..., 1::2] = packed >> 4
+    return cells[..., :lines*columns].reshape(packed.shape[:-1] + (lines, columns))
+
+def pack_walls(grids):
+    """
+    Encodes (..., lines, columns) wall bitmasks into (..., ceil(lines*columns / 2)) wall nibbles.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    cells = grids.reshape(grids.shape[:-2] + (-1,))
+    if cells.shape[-1] % 2:
+        cells = np.concatenate((cells, np.zeros(cells.shape[:-1] + (1,), dtype=np.uint8)), axis=-1)
+    return cells[..., 0::2] | (cells[..., 1::2] << 4)
+
+def write_mazes(path, mazes):
+    """
+    Writes mazes to a container file, one record at a time.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the file to write.
+    mazes : iterable of Maze
+        The mazes, consumed lazily (e.g. generate.iter_mazes with a stop index).
+
+    Returns:
+    --------
+    int
+        The number of mazes written.
+    """
+    offsets = []
+    with open(path, 'wb') as file:
+        file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        position = FILE_HEADER.size
+        for maze in mazes:
+            record = maze.to_bytes()
+            offsets.append(position)
+            file.write(record)
+            position += len(record)
+        file.write(np.asarray(offsets, dtype='<u8').tobytes())
+        file.seek(0)
+        file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(offsets), position))
+    return len(offsets)
+
+def write_wall_grids(path, maze, grids, seed=None, start=0):
+    """
+    Writes a batch of samples sharing the special cells of a template maze, e.g. the output of
+    Maze.pave_many, to a container file without building any Maze.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the file to write.
+    maze : Maze
+        The template maze, giving the size and the special cells of the samples.
+    grids : numpy.ndarray
+        A (n, lines, columns) uint8 array of wall bitmasks.
+    seed : int or None, optional
+        The seed stored in the records. Default is None (the seed of the template).
+    start : int, optional
+        The index of the first sample, the following ones are numbered consecutively. Default is 0.
+
+    Returns:
+    --------
+    int
+        The number of mazes written.
+    """
+    n = len(grids)
+    seed = maze.seed if seed is None else seed
+    records = np.zeros(n, dtype=record_dtype(maze.lin, maze.col))
+    records['lines'] = maze.lin
+    records['columns'] = maze.col
+    records['seed'] = 0xFFFFFFFF if seed is None else seed
+    records['index'] = np.arange(start, start + n)
+    for name in ('start', 'finish', 'prize'):
+        pos = getattr(maze, name + '_pos')
+        records[name] = (0xFFFF, 0xFFFF) if pos is None else pos
+    records['walls'] = pack_walls(grids)
+    offsets = FILE_HEADER.size + records.itemsize*np.arange(n, dtype='<u8')
+    with open(path, 'wb') as file:
+        file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, n, FILE_HEADER.size + records.nbytes))
+        file.write(records.tobytes())
+        file.write(offsets.tobytes())
+    return n
+
+def read_header(file):
+    """
+    Reads the header of an open container file.
+
+    Returns:
+    --------
+    tuple
+        (count, index offset).
+    """
+    magic, version, _, count, index_offset = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a maze container file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported maze container version: {version}")
+    return count, index_offset
+
+def read_offsets(path):
+    """
+    Returns the offsets of the records of a container file, as a uint64 array.
+    """
+    with open(path, 'rb') as file:
+        count, index_offset = read_header(file)
+        file.seek(index_offset)
+        return np.frombuffer(file.read(8*count), dtype='<u8')
+
+def read_mazes(path):
+    """
+    Yields the mazes of a container file, in order, reading one record at a time.
+    """
+    offsets = read_offsets(path)
+    with open(path, 'rb') as file:
+        for offset in offsets.tolist():
+            file.seek(offset)
+            header = file.read(RECORD_HEADER.size)
+            lines, columns = struct.unpack_from('<HH', header)
+            yield Maze.from_bytes(header + file.read(record_size(lines, columns) - RECORD_HEADER.size))
+
+def read_layout(path):
+    """
+    Checks that the records of a container file form a regular array and returns its layout.
+
+    The offset index must list every record at a multiple of the size of the first record, and the last
+    record must have the shape of the first one, so records of another size are always detected. Records of
+    the same size but another shape (e.g. 6x4 among 4x6) are rejected when they are read (see load_records
+    and MazeDataset).
+
+    Returns:
+    --------
+    tuple
+        (count, lines, columns) of the container, (0, 0, 0) if it is empty.
+
+    Raises:
+    -------
+    ValueError
+        If the records do not all have the same size.
+    """
+    with open(path, 'rb') as file:
+        count, index_offset = read_header(file)
+        if count == 0:
+            return 0, 0, 0
+        lines, columns = struct.unpack('<HH', file.read(4))
+        size = record_size(lines, columns)
+        file.seek(FILE_HEADER.size + (count-1)*size)
+        last = struct.unpack('<HH', file.read(4))
+    if index_offset != FILE_HEADER.size + count*size or last != (lines, columns):
+        raise ValueError("The records of the container do not all have the same size")
+    offsets = np.fromfile(path, dtype='<u8', count=count, offset=index_offset)
+    if len(offsets) != count or (offsets != FILE_HEADER.size + size*np.arange(count, dtype='<u8')).any():
+        raise ValueError("The records of the container do not all have the same size")
+    return count, lines, columns
+
+def load_records(path):
+    """
+    Reads a container file whose records all have the same size as one structured array (see read_layout).
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (n,) array of record_dtype records.
+    """
+    count, lines, columns = read_layout(path)
+    dtype = record_dtype(lines, columns)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    records = np.fromfile(path, dtype=dtype, count=count, offset=FILE_HEADER.size)
+    if (records['lines'] != lines).any() or (records['columns'] != columns).any():
+        raise ValueError("The records of the container do not all have the same size")
+    return records
+
+def load_wall_grids(path):
+    """
+    Reads the walls of a container file whose records all have the same size.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (n, lines, columns) uint8 array of wall bitmasks.
+    """
+    records = load_records(path)
+    if len(records) == 0:
+        return np.zeros((0, 0, 0), dtype=np.uint8)
+    return unpack_walls(records['walls'], int(records['lines'][0]), int(records['columns'][0]))
+
+class MazeDataset:
+    """
+    Random access to the samples of a container file whose records all have the same size, through a
+    read-only memory map: opening it reads the file header and checks the offset index (see read_layout),
+    and records are paged in as they are used.
+
+    Attributes:
+    -----------
+    path : str
+        The path of the container file.
+    lines : int
+        The number of lines of the mazes.
+    columns : int
+        The number of columns of the mazes.
+    count : int
+        The number of records.
+    records : numpy.memmap
+        The (n,) record_dtype array of the records, mapped onto the file.
+    """
+    def __init__(self, path):
+        """
+        Maps a container file.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the container file.
+        """
+        self.path = path
+        self.count, self.lines, self.columns = read_layout(path)
+        self._map()
+
+    def _map(self):
+        """
+        Maps the records of the container file, already checked by read_layout.
+        """
+        dtype = record_dtype(self.lines, self.columns)
+        if self.count:
+            self.records = np.memmap(self.path, dtype=dtype, mode='r', offset=FILE_HEADER.size,
+                                     shape=(self.count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+    def __getstate__(self):
+        # pickling a memmap would copy the whole container, worker processes map the file again instead
+        state = self.__dict__.copy()
+        del state['records']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        """
+        Returns a record, or the records selected by a slice or an index array, without decoding them.
+
+        Integers and slices give views on the file, index arrays copy the selected records only.
+
+        Raises:
+        -------
+        ValueError
+            If a selected record does not have the shape of the first record of the container.
+        """
+        records = self.records[index]
+        if (records['lines'] != self.lines).any() or (records['columns'] != self.columns).any():
+            raise ValueError("The records of the container do not all have the same size")
+        return records
+
+    @property
+    def packed_walls(self):
+        """
+        Returns the (n, ceil(lines*columns / 2)) wall nibbles of all the records, a view on the file.
+        """
+        return self.records['walls']
+
+    def walls(self, index):
+        """
+        Decodes the walls of a record, or of the records selected by a slice or an index array.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (lines, columns), or (k, lines, columns), uint8 array of wall bitmasks.
+
+        Raises:
+        -------
+        ValueError
+            If a selected record does not have the shape of the first record of the container.
+        """
+        return unpack_walls(self[index]['walls'], self.lines, self.columns)
+
+    def maze(self, index):
+        """
+        Builds the Maze of a record.
+
+        Parameters:
+        -----------
+        index : int
+            The index of the record in the container.
+
+        Returns:
+        --------
+        Maze
+            The maze, with its walls, special cells, seed and index.
+        """
+        return Maze.from_bytes(self.records[index].tobytes())
@@ -0,0 +1,136 @@
+"""
+Streaming generation of maze samples.
+
+A run is defined by its size, its seed and its learner: the template maze (start, finish and prize cells)
+and the two paving Q-tables are derived from the seed once, then sample i is the template paved with
+the random stream sample_rng(seed, i). Samples are produced one at a time, on demand, so a consumer
+can draw as many as it needs without any of them being materialized ahead.
+
+    from generate import iter_mazes
+    for maze in iter_mazes(8, 8, seed=40, learner='distance'):
+        ...
+"""
+import itertools
+import numpy as np
+from maze import Maze, sample_rng
+from q_learner import QLearner, DistanceFieldLearner
+
+LEARNERS = ('qlearning', 'fast', 'distance')
+
+def train_template(rows, cols, seed, learner='qlearning'):
+    """
+    Builds the template maze of a run and learns its two paving Q-tables.
+
+    Parameters:
+    -----------
+    rows : int
+        The number of rows of the mazes.
+    cols : int
+        The number of columns of the mazes.
+    seed : int
+        The random seed of the run.
+    learner : str, optional
+        'qlearning', 'fast' (Q-learning with QLearner.learn_fast) or 'distance' (DistanceFieldLearner).
+        Default is 'qlearning'.
+
+    Returns:
+    --------
+    tuple
+        (maze, q1, q2): the template maze, whose seed is set, the Q-table leading from the finish cell
+        to the start cell and the one leading from the prize cell to the start cell.
+    """
+    if learner not in LEARNERS:
+        raise ValueError(f"Unknown learner: {learner}")
+    # The template maze and the learners draw from the root stream, each sample from its own child stream
+    rng = np.random.default_rng(seed)
+    maze = Maze(rows, cols)
+    maze.seed = seed
+    maze.init_maze(rng)
+    # Learn a way from start to prize and from prize to start
+    if learner == 'distance':
+        learner1 = DistanceFieldLearner(maze)
+        learner2 = DistanceFieldLearner(maze)
+    else:
+        learner1 = QLearner(maze, fast=learner == 'fast', rng=rng)
+        learner2 = QLearner(maze, fast=learner == 'fast', rng=rng)
+    learner1.learn_from_finish()
+    learner2.learn_from_prize()
+    return maze, learner1.q_table, learner2.q_table
+
+def pave_sample(maze, q1, q2, index):
+    """
+    Returns sample `index` of a run: a clone of the template maze paved with the two Q-tables.
+
+    Parameters:
+    -----------
+    maze : Maze
+        The template maze, whose seed is the seed of the run.
+    q1 : numpy.ndarray
+        The Q-table leading from the finish cell to the start cell.
+    q2 : numpy.ndarray
+        The Q-table leading from the prize cell to the start cell.
+    index : int
+        The index of the sample.
+
+    Returns:
+    --------
+    Maze
+        The paved maze, with its seed and index set.
+    """
+    maze_i = maze.clone()
+    maze_i.index = index
+    maze_i.pave_qtable(q1, q2, sample_rng(maze.seed, index))
+    return maze_i
+
+def iter_samples(maze, q1, q2, start=0, stop=None):
+    """
+    Yields the samples of a run from already trained Q-tables (see pave_sample), one at a time.
+
+    Parameters:
+    -----------
+    maze : Maze
+        The template maze, whose seed is the seed of the run.
+    q1 : numpy.ndarray
+        The Q-table leading from the finish cell to the start cell.
+    q2 : numpy.ndarray
+        The Q-table leading from the prize cell to the start cell.
+    start : int, optional
+        The index of the first sample. Default is 0.
+    stop : int or None, optional
+        The index past the last sample. Default is None (endless stream).
+
+    Yields:
+    -------
+    Maze
+        The samples start, start+1, ..., each paved only when requested.
+    """
+    indices = itertools.count(start) if stop is None else range(start, stop)
+    for index in indices:
+        yield pave_sample(maze, q1, q2, index)
+
+def iter_mazes(rows, cols, seed=40, learner='qlearning', start=0, stop=None):
+    """
+    Yields the samples of a run, training its Q-tables once before the first sample.
+
+    Parameters:
+    -----------
+    rows : int
+        The number of rows of the mazes.
+    cols : int
+        The number of columns of the mazes.
+    seed : int, optional
+        The random seed of the run. Default is 40.
+    learner : str, optional
+        The learner of the paving Q-tables (see train_template). Default is 'qlearning'.
+    start : int, optional
+        The index of the first sample. Default is 0.
+    stop : int or None, optional
+        The index past the last sample. Default is None (endless stream).
+
+    Yields:
+    -------
+    Maze
+        The samples start, start+1, ..., identical to those generated by main.py with the same arguments.
+    """
+    maze, q1, q2 = train_template(rows, cols, seed, learner)
+    yield from iter_samples(maze, q1, q2, start, stop)
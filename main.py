@@ -1,9 +1,10 @@
-from maze import Maze
+from maze import plot_many
 import os
-from q_learner import QLearner
+from generate import LEARNERS, train_template, pave_sample, iter_samples
 import argparse
-import copy
-import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
 
 def create_dir(root):
     """Create a directory and its parent directories if they do not already exist.
@@ -19,36 +20,95 @@ def create_dir(root):
     # directory already exists
         pass
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--Save",help='Folder to save outputs',action='store_true')
-parser.add_argument("--Draw",help='Print outputs',action='store_true')
-parser.add_argument("--seed",help='Random seed for reproducibility',type=int,default=40)
-parser.add_argument("--rows",help='Number of rows in the maze',type=int,default=4)
-parser.add_argument("--cols",help='Number of columns in the maze',type=int,default=4)
-parser.add_argument("--nsample",help='Number of mazes generated',type=int,default=10)
-args = parser.parse_args()
-
-
-random.seed(args.seed)
-
-maze = Maze(args.rows, args.cols)
-maze.init_maze()
-# Learn a way from start to prize and from prize to start
-learner1 = QLearner(maze)
-learner2 = QLearner(maze)
-learner1.learn_from_finish()
-learner2.learn_from_prize()
-
-if args.Save:
-    create_dir("Mazes")
-    create_dir("Mazes/"+str(args.rows)+"X"+str(args.cols))
-
-for i in range(args.nsample):
-    maze_i = copy.deepcopy(maze)
-    maze_i.pave_qtable(learner1.q_table,learner2.q_table)
-    if args.Draw:
-        print("*"*100+"\n")
-        print("Maze "+str(i)+" :")
-        maze_i.draw()
+def render_sample(maze_i, draw, save_dir, raster=False, style='ascii'):
+    """Draw and/or save a paved sample.
+    Args:
+        maze_i (Maze): The sample, with its index set (see generate.pave_sample).
+        draw (bool): Whether to return the textual representation of the maze.
+        save_dir (str or None): The directory where the image of the maze is saved, None to skip saving.
+        raster (bool): Whether to save a PNG rasterized without matplotlib instead of a plotted JPG.
+        style (str): The text style of drawn mazes, 'ascii', 'box' or 'half' (see Maze.to_text).
+
+    Returns:
+        str: The textual representation of the maze, or an empty string if draw is False.
+    """
+    i = maze_i.index
+    text = ""
+    if draw:
+        text = "*"*100+"\n\n"+"Maze "+str(i)+" :\n"+maze_i.to_text(style)
+    if save_dir is not None and raster:
+        maze_i.save_image(save_dir+"/"+str(i)+".png")
+    elif save_dir is not None:
+        # the figure is reused by every sample plotted in this process
+        plot_many([maze_i], [save_dir+"/"+str(i)+".jpg"])
+    return text
+
+# State of a worker process, set once by init_worker
+_worker = {}
+
+def init_worker(maze, shm_name, shape, draw, save_dir, raster, style):
+    """Attach a worker process to the Q-tables shared by the parent process.
+    Args:
+        maze (Maze): The template maze, whose seed is the seed of the run.
+        shm_name (str): The name of the shared memory block holding both Q-tables.
+        shape (tuple): The shape (2, rows, cols, 4) of the stacked Q-tables.
+        draw (bool): Whether samples are drawn.
+        save_dir (str or None): The directory where images are saved, None to skip saving.
+        raster (bool): Whether images are rasterized without matplotlib.
+        style (str): The text style of drawn mazes.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    q = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker.update(shm=shm, maze=maze, q=q, draw=draw, save_dir=save_dir, raster=raster, style=style)
+
+def worker_sample(i):
+    """Pave and render sample i in a worker process (see render_sample)."""
+    maze_i = pave_sample(_worker['maze'], _worker['q'][0], _worker['q'][1], i)
+    return render_sample(maze_i, _worker['draw'], _worker['save_dir'], _worker['raster'], _worker['style'])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--Save",help='Folder to save outputs',action='store_true')
+    parser.add_argument("--Draw",help='Print outputs',action='store_true')
+    parser.add_argument("--seed",help='Random seed for reproducibility',type=int,default=40)
+    parser.add_argument("--rows",help='Number of rows in the maze',type=int,default=4)
+    parser.add_argument("--cols",help='Number of columns in the maze',type=int,default=4)
+    parser.add_argument("--nsample",help='Number of mazes generated',type=int,default=10)
+    parser.add_argument("--learner",help='How the paving tables are learned: Q-learning, fast Q-learning or exact distance field',
+                        choices=LEARNERS,default='qlearning')
+    parser.add_argument("--style",help='Text style of printed mazes',choices=['ascii','box','half'],default='ascii')
+    parser.add_argument("--raster",help='Save PNG images rasterized without matplotlib',action='store_true')
+    parser.add_argument("--workers",help='Number of processes paving and rendering the samples',type=int,default=1)
+    args = parser.parse_args()
+
+
+    maze, q1, q2 = train_template(args.rows, args.cols, args.seed, args.learner)
+
+    save_dir = None
     if args.Save:
-        maze_i.plot("Mazes/"+str(args.rows)+"X"+str(args.cols)+"/"+str(i)+".jpg")
\ No newline at end of file
+        save_dir = "Mazes/"+str(args.rows)+"X"+str(args.cols)
+        create_dir("Mazes")
+        create_dir(save_dir)
+
+    if args.workers <= 1:
+        for maze_i in iter_samples(maze, q1, q2, 0, args.nsample):
+            print(render_sample(maze_i, args.Draw, save_dir, args.raster, args.style), end='')
+        return
+
+    # Share both Q-tables with the workers once, instead of pickling them with every task
+    q = np.stack((q1, q2))
+    shm = shared_memory.SharedMemory(create=True, size=q.nbytes)
+    try:
+        np.ndarray(q.shape, dtype=q.dtype, buffer=shm.buf)[:] = q
+        with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                                 initargs=(maze, shm.name, q.shape, args.Draw, save_dir,
+                                           args.raster, args.style)) as executor:
+            chunksize = max(1, args.nsample // (4*args.workers))
+            for text in executor.map(worker_sample, range(args.nsample), chunksize=chunksize):
+                print(text, end='')
+    finally:
+        shm.close()
+        shm.unlink()
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,186 @@
-import random
-import matplotlib.pyplot as plt
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
-import matplotlib.image as mpimg
+import os
+import struct
+import sys
+from collections.abc import Mapping
 import numpy as np
+from render import get_sprite, sprite_data_uri, sprite_file, write_image, write_png
+
+# Bit assigned to each wall in the wall bitmask of a cell (see Maze.wall_grid).
+NORTH = 1
+SOUTH = 2
+EAST = 4
+WEST = 8
+DIRECTIONS = ('north', 'south', 'east', 'west')
+WALL_BITS = {'north': NORTH, 'south': SOUTH, 'east': EAST, 'west': WEST}
+ALL_WALLS = NORTH | SOUTH | EAST | WEST
+
+# Header of the binary form of a maze (see Maze.to_bytes): lines, columns, seed, index, then the (x, y)
+# coordinates of the start, finish and prize cells, little-endian, 24 bytes
+RECORD_HEADER = struct.Struct('<HHIIHHHHHH')
+# Stored in place of a missing seed, index or coordinate
+MISSING_U32 = 0xFFFFFFFF
+MISSING_U16 = 0xFFFF
+
+def sample_rng(seed, index):
+    """
+    Returns the random generator of sample `index` of a run seeded with `seed`.
+
+    It is the index-th child of np.random.SeedSequence(seed).spawn, built directly from its spawn key,
+    so any sample can be regenerated on its own without replaying the previous ones.
+
+    Parameters:
+    - seed (int): the seed of the run
+    - index (int): the index of the sample
+
+    Returns:
+    - numpy.random.Generator: the generator of the sample
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+def transition_table(lines, columns):
+    """
+    Builds the move table of an open lines x columns grid.
+
+    Cells are numbered x*columns + y and actions follow DIRECTIONS (0: north, 1: south, 2: east, 3: west).
+
+    Returns:
+    - numpy.ndarray: a (lines*columns, 4) int array giving the cell reached by each action, -1 when the move leaves the grid
+    """
+    x, y = np.divmod(np.arange(lines*columns), columns)
+    table = np.empty((lines*columns, 4), dtype=np.intp)
+    table[:, 0] = np.where(x > 0, x*columns + y - columns, -1)
+    table[:, 1] = np.where(x < lines-1, x*columns + y + columns, -1)
+    table[:, 2] = np.where(y < columns-1, x*columns + y + 1, -1)
+    table[:, 3] = np.where(y > 0, x*columns + y - 1, -1)
+    return table
+
+def edge_table(lines, columns):
+    """
+    Builds the wall table of a lines x columns maze.
+
+    Cells are numbered x*columns + y and actions follow DIRECTIONS, as in transition_table.
+
+    Returns:
+    - numpy.ndarray: a (lines*columns, 4) int array giving the index, in the flat wall buffer of a Maze
+      (h_walls then v_walls, see Maze.clone), of the wall crossed by each action
+    """
+    x, y = np.divmod(np.arange(lines*columns), columns)
+    split = (lines+1)*columns
+    table = np.empty((lines*columns, 4), dtype=np.intp)
+    table[:, 0] = x*columns + y
+    table[:, 1] = (x+1)*columns + y
+    table[:, 2] = split + x*(columns+1) + y + 1
+    table[:, 3] = split + x*(columns+1) + y
+    return table
+
+# Move and wall tables of the paving kernel as Python lists, one pair per maze size
+_paving_tables = {}
+
+def paving_tables(lines, columns):
+    """
+    Returns the transition_table and edge_table of a maze size as nested lists, built once per size.
+    """
+    key = (lines, columns)
+    if key not in _paving_tables:
+        _paving_tables[key] = (transition_table(lines, columns).tolist(), edge_table(lines, columns).tolist())
+    return _paving_tables[key]
+
+def wall_bitmask(h_walls, v_walls):
+    """
+    Combines edge arrays into per-cell wall bitmasks (NORTH, SOUTH, EAST, WEST).
+
+    Parameters:
+    - h_walls (numpy.ndarray): a (..., lines+1, columns) boolean array of horizontal walls
+    - v_walls (numpy.ndarray): a (..., lines, columns+1) boolean array of vertical walls
+
+    Returns:
+    - numpy.ndarray: a (..., lines, columns) uint8 array
+    """
+    grid = h_walls[..., :-1, :] * np.uint8(NORTH)
+    grid |= h_walls[..., 1:, :] * np.uint8(SOUTH)
+    grid |= v_walls[..., 1:] * np.uint8(EAST)
+    grid |= v_walls[..., :-1] * np.uint8(WEST)
+    return grid
+
+class CellWalls(Mapping):
+    """
+    Dictionary-like view of the walls of one cell, backed by the wall edge arrays of its maze.
+
+    Reading a key returns whether the wall is present, assigning a key sets or clears the
+    corresponding edge, which is shared with the neighbouring cell.
+    """
+    __slots__ = ('maze', 'x', 'y')
+
+    def __init__(self, maze, x, y):
+        self.maze = maze
+        self.x = x
+        self.y = y
+
+    def __getitem__(self, direction):
+        return self.maze.has_wall(self.x, self.y, direction)
+
+    def __setitem__(self, direction, value):
+        edges, i, j = self.maze.wall_edge(self.x, self.y, direction)
+        edges[i, j] = bool(value)
+        self.maze.reset_components()
+
+    def __iter__(self):
+        return iter(DIRECTIONS)
+
+    def __len__(self):
+        return len(DIRECTIONS)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 class Cell:
     """
     Represents a cell in the maze grid.
 
+    A cell is a lightweight view on the walls of its maze, it is only created when requested
+    (see Maze.get_cell) and does not own any state besides its coordinates.
+
     Attributes:
         x (int): The x coordinate of the cell.
         y (int): The y coordinate of the cell.
-        walls (list): A list of booleans representing whether there is a wall to the north, south, east, or west of the cell.
-        is_prize (bool): True if the cell is a prize cell, False otherwise.
-        is_start (bool): True if the cell is the start cell, False otherwise.
-        is_finish (bool): True if the cell is the finish cell, False otherwise.
+        maze (Maze): The maze the cell belongs to, or None for a detached cell.
+        walls (CellWalls): A mapping of booleans representing whether there is a wall to the north, south, east, or west of the cell.
+        prize (bool): True if the cell is a prize cell, False otherwise.
+        start (bool): True if the cell is the start cell, False otherwise.
+        finish (bool): True if the cell is the finish cell, False otherwise.
     """
-    def __init__(self, x, y):
+    __slots__ = ('x', 'y', 'maze')
+
+    def __init__(self, x, y, maze=None):
         """
         Initializes a new Cell object.
 
         Args:
             x (int): The x coordinate of the cell.
             y (int): The y coordinate of the cell.
+            maze (Maze, optional): The maze the cell belongs to. A detached cell has all its walls.
         """
         self.x = x
         self.y = y
-        self.walls = {'north': True, 'south': True, 'east': True, 'west': True}
-        self.prize = False
-        self.start = False
-        self.finish = False
+        self.maze = maze
+
+    @property
+    def walls(self):
+        if self.maze is None:
+            return {direction: True for direction in DIRECTIONS}
+        return CellWalls(self.maze, self.x, self.y)
+
+    @property
+    def prize(self):
+        return self.maze is not None and (self.x, self.y) == self.maze.prize_pos
+
+    @property
+    def start(self):
+        return self.maze is not None and (self.x, self.y) == self.maze.start_pos
+
+    @property
+    def finish(self):
+        return self.maze is not None and (self.x, self.y) == self.maze.finish_pos
 
     def __eq__(self,other_cell):
         """
@@ -71,6 +222,26 @@ class Cell:
         """
         return self.__str__()
 
+class CellGrid:
+    """
+    Read-only accessor returning Cell views, indexable as grid[x][y] or grid[x, y].
+    """
+    __slots__ = ('maze', 'x')
+
+    def __init__(self, maze, x=None):
+        self.maze = maze
+        self.x = x
+
+    def __getitem__(self, index):
+        if self.x is not None:
+            return self.maze.get_cell(self.x, index)
+        if isinstance(index, tuple):
+            return self.maze.get_cell(*index)
+        return CellGrid(self.maze, index)
+
+    def __len__(self):
+        return self.maze.col if self.x is not None else self.maze.lin
+
 class Maze:
     """
     This class represents a maze with randomly generated walls and a start, finish, and prize cell. 
@@ -78,10 +249,18 @@ class Maze:
     Attributes:
     - lines (int): the number of lines in the maze
     - columns (int): the number of columns in the maze
-    - cells (numpy.ndarray): a 2D numpy array of Cell objects representing the cells in the maze
+    - h_walls (numpy.ndarray): a (lines+1, columns) boolean array, h_walls[x, y] is the wall north of cell (x, y)
+    - v_walls (numpy.ndarray): a (lines, columns+1) boolean array, v_walls[x, y] is the wall west of cell (x, y)
+    - wall_grid (numpy.ndarray): a 2D uint8 array holding, for each cell, a bitmask of its walls (NORTH, SOUTH, EAST, WEST),
+      derived from the edge arrays
+    - start_pos, finish_pos, prize_pos (tuple): the (x, y) coordinates of the special cells
+    - seed, index (int or None): the seed of the run and the index of the sample the maze was generated as, if any
+    - cells (CellGrid): an accessor returning Cell views, cells[x][y]
     - start_cell (Cell): the cell where the maze begins
     - finish_cell (Cell): the cell where the maze ends
     - prize_cell (Cell): the cell that contains the prize
+    - the connected components of the cells, kept in a union-find structure updated by destroy_wall once
+      they are first needed (see connected)
     """
     def __init__(self, lines, columns):
         """
@@ -93,11 +272,193 @@ class Maze:
         """
         self.lin = lines
         self.col = columns
-        self.cells = np.array([[Cell(x, y) for y in range(columns)] for x in range(lines)])
-        self.start_cell = None
-        self.finish_cell = None
-        self.prize_cell = None
-    
+        # Every wall is stored once, as an edge shared by the two cells it separates. Both edge arrays
+        # are views on one flat buffer, so the whole wall state is copied at once (see clone)
+        self._walls = np.ones((lines+1)*columns + lines*(columns+1), dtype=bool)
+        self._link_walls()
+        self.start_pos = None
+        self.finish_pos = None
+        self.prize_pos = None
+        self.seed = None
+        self.index = None
+        # Union-find parents of the connected components, built on first use (see connected)
+        self._parent = None
+
+    def _link_walls(self):
+        """
+        Points h_walls and v_walls at their part of the flat wall buffer.
+        """
+        split = (self.lin+1)*self.col
+        self.h_walls = self._walls[:split].reshape(self.lin+1, self.col)
+        self.v_walls = self._walls[split:].reshape(self.lin, self.col+1)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the views are rebuilt from the buffer, pickling them would store the walls twice and unlink them
+        del state['h_walls'], state['v_walls']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._link_walls()
+
+    def clone(self):
+        """
+        Returns a copy of the maze, its walls and special cells, with a single copy of the wall buffer.
+
+        Returns:
+        - Maze: the copy, whose connected components are rebuilt when first needed
+        """
+        maze = Maze.__new__(Maze)
+        maze.lin = self.lin
+        maze.col = self.col
+        maze._walls = self._walls.copy()
+        maze._link_walls()
+        maze.start_pos = self.start_pos
+        maze.finish_pos = self.finish_pos
+        maze.prize_pos = self.prize_pos
+        maze.seed = self.seed
+        maze.index = self.index
+        maze._parent = None
+        return maze
+
+    def reset_walls(self):
+        """
+        Puts back every wall of the maze, keeping its special cells.
+        """
+        self._walls.fill(True)
+        self._parent = None
+
+    def set_wall_grid(self, grid):
+        """
+        Sets the walls from a (lines, columns) bitmask array, as returned by wall_grid.
+
+        The north and west bits of each cell give the walls it shares with its neighbours, the south bits
+        of the last line and the east bits of the last column give the remaining outer walls.
+        """
+        grid = np.asarray(grid)
+        self.h_walls[:-1] = grid & NORTH
+        self.h_walls[-1] = grid[-1] & SOUTH
+        self.v_walls[:, :-1] = grid & WEST
+        self.v_walls[:, -1] = grid[:, -1] & EAST
+        self._parent = None
+
+    def to_bytes(self):
+        """
+        Serializes the maze to its binary form: a RECORD_HEADER followed by the walls of the cells.
+
+        The walls are the wall_grid bitmasks of the cells in row-major order, one 4-bit nibble per cell,
+        two cells per byte: the even cell in the low nibble, the odd cell in the high one, and a zero high
+        nibble after an odd last cell. A missing seed or index is stored as 0xFFFFFFFF, a missing special
+        cell as (0xFFFF, 0xFFFF).
+
+        Returns:
+        - bytes: RECORD_HEADER.size + ceil(lines*columns / 2) bytes
+        """
+        if self.lin > MISSING_U16 - 1 or self.col > MISSING_U16 - 1:
+            raise ValueError(f"Maze too large to serialize: {self.lin}x{self.col}")
+        numbers = []
+        for value in (self.seed, self.index):
+            if value is not None and not 0 <= value < MISSING_U32:
+                raise ValueError(f"Seed or index does not fit in 32 bits: {value}")
+            numbers.append(MISSING_U32 if value is None else value)
+        for pos in (self.start_pos, self.finish_pos, self.prize_pos):
+            numbers.extend((MISSING_U16, MISSING_U16) if pos is None else pos)
+        cells = self.wall_grid.ravel()
+        if cells.size % 2:
+            cells = np.append(cells, np.uint8(0))
+        return RECORD_HEADER.pack(self.lin, self.col, *numbers) + (cells[0::2] | (cells[1::2] << 4)).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Builds a maze from its binary form (see to_bytes).
+
+        Parameters:
+        - data (bytes-like): the record, any bytes past its end are ignored
+
+        Returns:
+        - Maze: the maze, with its walls, special cells, seed and index
+        """
+        lines, columns, seed, index, *coords = RECORD_HEADER.unpack_from(data)
+        size = (lines*columns + 1) // 2
+        packed = np.frombuffer(data, dtype=np.uint8, count=size, offset=RECORD_HEADER.size)
+        cells = np.empty(2*size, dtype=np.uint8)
+        cells[0::2] = packed & 0x0F
+        cells[1::2] = packed >> 4
+        maze = cls(lines, columns)
+        maze.set_wall_grid(cells[:lines*columns].reshape(lines, columns))
+        maze.seed = None if seed == MISSING_U32 else seed
+        maze.index = None if index == MISSING_U32 else index
+        positions = [None if coords[k] == MISSING_U16 else (coords[k], coords[k+1]) for k in (0, 2, 4)]
+        maze.start_pos, maze.finish_pos, maze.prize_pos = positions
+        return maze
+
+    @property
+    def cells(self):
+        return CellGrid(self)
+
+    @property
+    def wall_grid(self):
+        """
+        Returns the walls of every cell as a (lines, columns) uint8 bitmask array (a copy, built from the edge arrays).
+        """
+        return wall_bitmask(self.h_walls, self.v_walls)
+
+    @property
+    def start_cell(self):
+        return None if self.start_pos is None else self.get_cell(*self.start_pos)
+
+    @property
+    def finish_cell(self):
+        return None if self.finish_pos is None else self.get_cell(*self.finish_pos)
+
+    @property
+    def prize_cell(self):
+        return None if self.prize_pos is None else self.get_cell(*self.prize_pos)
+
+    def get_cell(self, x, y):
+        """
+        Returns a view on the cell at the given coordinates.
+
+        Parameters:
+        - x (int): the line of the cell
+        - y (int): the column of the cell
+
+        Returns:
+        - Cell: the cell view
+        """
+        return Cell(x, y, self)
+
+    def wall_edge(self, x, y, direction):
+        """
+        Locates the edge storing the wall of a cell in a given direction.
+
+        Parameters:
+        - x (int): the line of the cell
+        - y (int): the column of the cell
+        - direction (str): north, south, east or west
+
+        Returns:
+        - tuple: (edge array, i, j) such that edge_array[i, j] is the wall
+        """
+        if direction == 'north':
+            return self.h_walls, x, y
+        if direction == 'south':
+            return self.h_walls, x+1, y
+        if direction == 'east':
+            return self.v_walls, x, y+1
+        if direction == 'west':
+            return self.v_walls, x, y
+        raise ValueError(f"Unknown direction: {direction}")
+
+    def has_wall(self, x, y, direction):
+        """
+        Returns True if the cell (x, y) has a wall in the given direction.
+        """
+        edges, i, j = self.wall_edge(x, y, direction)
+        return bool(edges[i, j])
+
     def __str__(self):
         """
         Returns a string representation of the maze.
@@ -105,7 +466,7 @@ class Maze:
         Returns:
         - str: a string representation of the maze
         """
-        return str(self.cells)    
+        return '\n'.join(' '.join(f"({x}, {y})" for y in range(self.col)) for x in range(self.lin))
     
     def destroy_wall(self,cell,direction):
         """
@@ -117,182 +478,704 @@ class Maze:
         """
         row = cell.x
         col = cell.y
+        index = row*self.col + col
         if direction == "north" and row > 0:
-            self.cells[row][col].walls["north"] = False
-            self.cells[row-1][col].walls["south"] = False
+            self.h_walls[row, col] = False
+            neighbor = index - self.col
         elif direction == "south" and row < self.lin-1:
-            self.cells[row][col].walls["south"] = False
-            self.cells[row+1][col].walls["north"] = False
+            self.h_walls[row+1, col] = False
+            neighbor = index + self.col
         elif direction == "east" and col < self.col-1:
-            self.cells[row][col].walls["east"] = False
-            self.cells[row][col+1].walls["west"] = False
+            self.v_walls[row, col+1] = False
+            neighbor = index + 1
         elif direction == "west" and col > 0:
-            self.cells[row][col].walls["west"] = False
-            self.cells[row][col-1].walls["east"] = False
+            self.v_walls[row, col] = False
+            neighbor = index - 1
+        else:
+            return
+        if self._parent is not None:
+            self.union(index, neighbor)
+
+    def find(self, index):
+        """
+        Returns the representative of the connected component of a cell, building the union-find structure if needed.
+
+        Parameters:
+        - index (int): the flat index x*col + y of the cell
+
+        Returns:
+        - int: the flat index of the representative cell
+        """
+        if self._parent is None:
+            self.build_components()
+        parent = self._parent
+        while parent[index] != index:
+            # path halving
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def union(self, a, b):
+        """
+        Merges the connected components of the cells of flat indices a and b.
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a != b:
+            self._parent[max(a, b)] = min(a, b)
+
+    def connected(self, a, b):
+        """
+        Checks whether two cells are connected, in O(alpha(n)) amortized time once the components are built.
+
+        Parameters:
+        - a (Cell or tuple): a cell, or its (row, column) coordinates
+        - b (Cell or tuple): a cell, or its (row, column) coordinates
 
-    def init_maze(self):
+        Returns:
+        - bool: True if there is a path between the two cells
+        """
+        return self.find(self.cell_index(a)) == self.find(self.cell_index(b))
+
+    def build_components(self):
+        """
+        Builds the union-find structure from the current walls. It is then kept up to date by destroy_wall,
+        and dropped by reset_components when walls are modified in any other way.
+        """
+        self._parent = list(range(self.lin*self.col))
+        x, y = np.nonzero(~self.h_walls[1:-1])
+        for a in (x*self.col + y).tolist():
+            self.union(a, a + self.col)
+        x, y = np.nonzero(~self.v_walls[:, 1:-1])
+        for a in (x*self.col + y).tolist():
+            self.union(a, a + 1)
+
+    def reset_components(self):
+        """
+        Drops the union-find structure, it will be rebuilt from the walls when next needed.
+        """
+        self._parent = None
+
+    def init_maze(self, rng=None):
         """
         Initializes the maze by randomly setting the start, finish, and prize cells.
+
+        Parameters:
+        - rng (numpy.random.Generator, optional): the random generator to use, a fresh unseeded one by default
         """
-        self.set_start()
-        self.set_finish()
-        self.set_prize()
+        rng = np.random.default_rng(rng)
+        self.set_start(rng)
+        self.set_finish(rng)
+        self.set_prize(rng)
     
-    def set_start(self):
+    def set_start(self, rng=None):
         """
         Sets the start cell to a random cell in the maze.
+
+        Parameters:
+        - rng (numpy.random.Generator, optional): the random generator to use, a fresh unseeded one by default
         """
+        rng = np.random.default_rng(rng)
         found = False
         while not(found):
-            x = random.randint(0, self.lin-1)
-            y = random.randint(0, self.col-1)
-            cell = self.cells[x][y]
-            found = not (cell.prize or cell.finish)
-        cell.start = True
-        self.start_cell = cell
+            x = int(rng.integers(self.lin))
+            y = int(rng.integers(self.col))
+            found = (x, y) not in (self.prize_pos, self.finish_pos)
+        self.start_pos = (x, y)
     
-    def set_finish(self):
+    def set_finish(self, rng=None):
         """
         Sets the finish cell to a random cell in the maze.
+
+        Parameters:
+        - rng (numpy.random.Generator, optional): the random generator to use, a fresh unseeded one by default
         """
+        rng = np.random.default_rng(rng)
         found = False
         while not(found):
-            x = random.randint(0, self.lin-1)
-            y = random.randint(0, self.col-1)
-            cell = self.cells[x][y]
-            found = not (cell.prize or cell.start)
-        cell.finish = True
-        self.finish_cell = cell
+            x = int(rng.integers(self.lin))
+            y = int(rng.integers(self.col))
+            found = (x, y) not in (self.prize_pos, self.start_pos)
+        self.finish_pos = (x, y)
     
-    def set_prize(self):
+    def set_prize(self, rng=None):
         """
         Sets the prize cell to a random cell in the maze.
+
+        Parameters:
+        - rng (numpy.random.Generator, optional): the random generator to use, a fresh unseeded one by default
         """
+        rng = np.random.default_rng(rng)
         found = False
         while not(found):
-            x = random.randint(0, self.lin-1)
-            y = random.randint(0, self.col-1)
-            cell = self.cells[x][y]
-            found = not (cell.finish or cell.start)
-        cell.prize = True
-        self.prize_cell = cell
+            x = int(rng.integers(self.lin))
+            y = int(rng.integers(self.col))
+            found = (x, y) not in (self.finish_pos, self.start_pos)
+        self.prize_pos = (x, y)
 
 
-    def draw(self):
+    def markers(self, empty='   ', start=' S ', finish=' F ', prize=' P '):
         """
-        Draws the current state of the maze by printing a textual representation of the maze.
-        This method iterates through each cell in the maze, drawing its north and west walls and any
-        special cell markers (e.g., start, finish, or prize). The textual representation is printed
-        to the console.
+        Returns the text drawn inside each cell.
+
+        Parameters:
+        -----------
+        empty, start, finish, prize : str, optional
+            The text of an ordinary cell and of the start, finish and prize cells.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (lin, col) array of strings.
+        """
+        cells = np.full((self.lin, self.col), empty, dtype=object)
+        # the start marker wins over the finish and prize ones, as in draw
+        for pos, marker in ((self.prize_pos, prize), (self.finish_pos, finish), (self.start_pos, start)):
+            if pos is not None:
+                cells[pos] = marker
+        return cells
+
+    def wall_pixels(self):
+        """
+        Returns the walls of the maze on a (2*lin+1, 2*col+1) boolean pixel grid.
+
+        Cell (x, y) is pixel (2x+1, 2y+1) and is never set, its north wall is pixel (2x, 2y+1) and its
+        west wall pixel (2x+1, 2y). Corner pixels (even, even) are set when any wall touches them.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The boolean pixel grid.
+        """
+        pixels = np.zeros((2*self.lin+1, 2*self.col+1), dtype=bool)
+        pixels[::2, 1::2] = self.h_walls
+        pixels[1::2, ::2] = self.v_walls
+        corners = np.zeros((self.lin+1, self.col+1), dtype=bool)
+        corners[:, :-1] |= self.h_walls
+        corners[:, 1:] |= self.h_walls
+        corners[:-1] |= self.v_walls
+        corners[1:] |= self.v_walls
+        pixels[::2, ::2] = corners
+        return pixels
+
+    def to_text(self, style='ascii'):
+        """
+        Builds the textual representation of the maze printed by draw, in a single string.
+
+        With the default 'ascii' style each cell takes 4 characters and 2 lines: its north wall
+        ('+---' or '+   ') above, and its west wall ('|' or ' ') followed by its marker (' S ', ' F ',
+        ' P ' or '   '). The 'box' (see to_box_text) and 'half' (see to_half_block_text) styles are
+        more compact.
+
+        Parameters:
+        -----------
+        style : str, optional
+            'ascii', 'box' or 'half'. Default is 'ascii'.
+
+        Returns:
+        --------
+        str
+            The textual representation of the maze, ending with a newline.
         """
+        if style == 'box':
+            return self.to_box_text()
+        if style == 'half':
+            return self.to_half_block_text()
+        if style != 'ascii':
+            raise ValueError(f"Unknown text style: {style}")
+        north = np.where(self.h_walls, '+---', '+   ').astype(object)
+        west = np.where(self.v_walls[:, :-1], '|', ' ').astype(object) + self.markers()
+        lines = []
         for x in range(self.lin):
-            # draw north walls
-            for y in range(self.col):
-                print('+', end='')
-                if self.cells[x][y].walls['north']:
-                    print('---', end='')
-                else:
-                    print('   ', end='')
-            print('+')
-
-            # draw west walls and height
-            for y in range(self.col):
-                if self.cells[x][y].walls['west']:
-                    print('|', end='')
-                else:
-                    print(' ', end='')
-                if self.cells[x][y].start:
-                    print(' S ', end='')
-                elif self.cells[x][y].finish:
-                    print(' F ', end='')
-                elif self.cells[x][y].prize:
-                    print(' P ', end='')
-                else:
-                    print('   ', end='')
-            print('|')
-
-        # draw south walls
-        for y in range(self.col):
-            print('+', end='')
-            if self.cells[x][y].walls['south']:
-                print('---', end='')
+            lines.append(''.join(north[x]) + '+')
+            lines.append(''.join(west[x]) + '|')
+        lines.append(''.join(north[self.lin]) + '+')
+        return '\n'.join(lines) + '\n'
+
+    def to_box_text(self):
+        """
+        Builds a textual representation of the maze with Unicode box-drawing characters.
+
+        Each pixel of wall_pixels is one character, so a cell takes 2 characters and 2 lines: corners
+        are drawn with the glyph joining their walls, walls with '─' and '│', and cells with ' ' or
+        their marker ('S', 'F' or 'P').
+
+        Returns:
+        --------
+        str
+            The textual representation of the maze, ending with a newline.
+        """
+        pixels = self.wall_pixels()
+        padded = np.pad(pixels, 1)
+        # glyph of each corner, indexed by its arms: up 1, down 2, left 4, right 8
+        arms = (padded[:-2, 1:-1] * 1 + padded[2:, 1:-1] * 2 + padded[1:-1, :-2] * 4 + padded[1:-1, 2:] * 8)
+        glyphs = np.array(list(' ╵╷│╴┘┐┤╶└┌├─┴┬┼'), dtype=object)
+        text = np.full(pixels.shape, ' ', dtype=object)
+        text[::2, ::2] = glyphs[arms[::2, ::2]]
+        text[::2, 1::2] = np.where(pixels[::2, 1::2], '─', ' ')
+        text[1::2, ::2] = np.where(pixels[1::2, ::2], '│', ' ')
+        text[1::2, 1::2] = self.markers(' ', 'S', 'F', 'P')
+        return ''.join(''.join(line) + '\n' for line in text)
+
+    def to_half_block_text(self):
+        """
+        Builds a compact textual representation of the maze with half-block characters.
+
+        Two rows of wall_pixels are packed in each line with ' ', '▀', '▄' and '█', so a cell takes
+        2 characters and a single line. The start, finish and prize cells show 'S', 'F' and 'P',
+        which replaces the half-block of the wall above them.
+
+        Returns:
+        --------
+        str
+            The textual representation of the maze, ending with a newline.
+        """
+        pixels = np.pad(self.wall_pixels(), ((0, 1), (0, 0)))
+        glyphs = np.array([' ', '▀', '▄', '█'], dtype=object)
+        text = glyphs[pixels[:-1:2] * 1 + pixels[1::2] * 2]
+        # cell (x, y) is the lower half of character (x, 2y+1)
+        for pos, marker in ((self.prize_pos, 'P'), (self.finish_pos, 'F'), (self.start_pos, 'S')):
+            if pos is not None:
+                text[pos[0], 2*pos[1]+1] = marker
+        return ''.join(''.join(line) + '\n' for line in text)
+
+    def draw(self, file=None, style='ascii'):
+        """
+        Draws the current state of the maze by printing a textual representation of the maze.
+        The representation (see to_text) shows the walls of each cell and any special cell markers
+        (e.g., start, finish, or prize), it is built first and written at once to the console or to `file`.
+
+        Parameters:
+        -----------
+        file : file object, optional
+            The text stream to write to, sys.stdout by default.
+        style : str, optional
+            The text style, 'ascii', 'box' or 'half' (see to_text). Default is 'ascii'.
+        """
+        (file if file is not None else sys.stdout).write(self.to_text(style))
+
+    def wall_segments(self):
+        """
+        Returns the walls of the maze as line segments in plot coordinates (x to the right, y upwards).
+
+        Each wall is stored once as an edge, so walls shared by two cells produce a single segment.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (n_walls, 2, 2) float array of segments ((x0, y0), (x1, y1)).
+        """
+        rows, cols = np.nonzero(self.h_walls)
+        horizontal = np.stack((np.stack((cols, self.lin-rows), axis=1),
+                               np.stack((cols+1, self.lin-rows), axis=1)), axis=1)
+        rows, cols = np.nonzero(self.v_walls)
+        vertical = np.stack((np.stack((cols, self.lin-rows-1), axis=1),
+                             np.stack((cols, self.lin-rows), axis=1)), axis=1)
+        return np.concatenate((horizontal, vertical)).astype(float)
+
+    def render_array(self, cell_px=16, sprites=True):
+        """
+        Rasterizes the maze into an RGB image without matplotlib.
+
+        Walls are painted as one pixel wide black lines on a white background, cell (x, y) spanning
+        rows x*cell_px to (x+1)*cell_px and columns y*cell_px to (y+1)*cell_px, and the start, exit and
+        prize sprites are pasted inside their cells.
+
+        Parameters:
+        -----------
+        cell_px : int, optional
+            The size of a cell in pixels. Default is 16.
+        sprites : bool, optional
+            Whether to paste the sprites of the special cells. Default is True.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (lin*cell_px+1, col*cell_px+1, 3) uint8 array.
+        """
+        height, width = self.lin*cell_px + 1, self.col*cell_px + 1
+        image = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        # a pixel on a grid line is black if the wall on either side of it is present
+        horizontal = np.repeat(self.h_walls, cell_px, axis=1)
+        lines = np.zeros((self.lin+1, width), dtype=bool)
+        lines[:, :-1] |= horizontal
+        lines[:, 1:] |= horizontal
+        image[::cell_px][lines] = 0
+        vertical = np.repeat(self.v_walls, cell_px, axis=0)
+        lines = np.zeros((height, self.col+1), dtype=bool)
+        lines[:-1] |= vertical
+        lines[1:] |= vertical
+        image[:, ::cell_px][lines] = 0
+
+        if sprites and cell_px > 1:
+            for pos, name in ((self.start_pos, 'start'), (self.finish_pos, 'finish'), (self.prize_pos, 'prize')):
+                if pos is not None:
+                    x, y = pos
+                    image[x*cell_px+1:(x+1)*cell_px, y*cell_px+1:(y+1)*cell_px] = get_sprite(name, cell_px-1)
+        return image
+
+    def save_image(self, path, cell_px=16):
+        """
+        Rasterizes the maze with render_array and writes it directly as a PNG file, or a PPM file if `path`
+        ends with .ppm.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the image file.
+        cell_px : int, optional
+            The size of a cell in pixels. Default is 16.
+        """
+        write_image(path, self.render_array(cell_px))
+
+    def tile_zoom(self, tile_px=256, cell_px=16):
+        """
+        Returns the deepest zoom level of the tile pyramid of the maze.
+
+        At the deepest level a cell is cell_px pixels wide, each level above halves the resolution, and
+        level 0 fits the whole maze in a single tile_px x tile_px tile.
+
+        Parameters:
+        -----------
+        tile_px : int, optional
+            The size of a tile in pixels. Default is 256.
+        cell_px : int, optional
+            The size of a cell in pixels at the deepest level. Default is 16.
+
+        Returns:
+        --------
+        int
+            The deepest zoom level.
+        """
+        return max(0, int(np.ceil(np.log2(max(self.lin, self.col)*cell_px / tile_px))))
+
+    def render_tile(self, z, tx, ty, tile_px=256, cell_px=16):
+        """
+        Rasterizes one tile of the tile pyramid of the maze (see tile_zoom) into an RGB image.
+
+        Every pixel is computed from the cell under its center, so the cost and memory of a tile only
+        depend on tile_px, whatever the size of the maze and the zoom level. At the deepest level
+        tiles are crops of render_array(cell_px); when cells get smaller than a few pixels
+        walls keep a quarter of a cell on each side, so the texture of the maze stays visible.
+
+        Parameters:
+        -----------
+        z : int
+            The zoom level, from 0 to tile_zoom(tile_px, cell_px).
+        tx : int
+            The horizontal (column) index of the tile.
+        ty : int
+            The vertical (row) index of the tile.
+        tile_px : int, optional
+            The size of a tile in pixels. Default is 256.
+        cell_px : int, optional
+            The size of a cell in pixels at the deepest level. Default is 16.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (tile_px, tile_px, 3) uint8 array, white outside the maze.
+        """
+        # size of a pixel in cells
+        deepest = z == self.tile_zoom(tile_px, cell_px)
+        scale = 2.0**(self.tile_zoom(tile_px, cell_px) - z) / cell_px
+        half = min(scale/2, 0.25)
+        rows = (np.arange(ty*tile_px, (ty+1)*tile_px) + 0.5) * scale
+        cols = (np.arange(tx*tile_px, (tx+1)*tile_px) + 0.5) * scale
+        x, fx = np.divmod(rows, 1)
+        y, fy = np.divmod(cols, 1)
+        x, y = x.astype(np.intp), y.astype(np.intp)
+        # the last grid lines belong to the cells just past the maze, farther pixels are blank
+        inside = (x[:, None] <= self.lin) & (y <= self.col)
+        x, y = np.minimum(x, self.lin), np.minimum(y, self.col)
+
+        def wall(walls, rows, cols):
+            # walls[rows, cols] for a grid of rows x cols, without copying the walls of the maze:
+            # indices are clipped and walls past the edges of the maze are blank
+            valid = (((rows >= 0) & (rows < walls.shape[0]))[:, None]
+                     & ((cols >= 0) & (cols < walls.shape[1])))
+            return walls[np.clip(rows, 0, walls.shape[0]-1)[:, None], np.clip(cols, 0, walls.shape[1]-1)] & valid
+
+        near_north = (fx <= half + 1e-9)[:, None]
+        near_south = (1 - fx < half - 1e-9)[:, None]
+        near_west = fy <= half + 1e-9
+        near_east = 1 - fy < half - 1e-9
+        dark = ((near_north & wall(self.h_walls, x, y)) | (near_south & wall(self.h_walls, x+1, y))
+                | (near_west & wall(self.v_walls, x, y)) | (near_east & wall(self.v_walls, x, y+1))
+                # north-west corner, also reached by the walls of the cells above and on the left
+                | (near_north & near_west & (wall(self.h_walls, x, y-1) | wall(self.v_walls, x-1, y))))
+
+        tile = np.full((tile_px, tile_px, 3), 255, dtype=np.uint8)
+        # sprites only cover the inside of their cell, not its grid lines
+        inner_rows = ~(near_north | near_south)[:, 0]
+        inner_cols = ~(near_west | near_east)
+        for pos, name in ((self.start_pos, 'start'), (self.finish_pos, 'finish'), (self.prize_pos, 'prize')):
+            # as in render_array, cells of a single pixel have no sprite at the deepest level
+            if pos is None or (deepest and cell_px < 2):
+                continue
+            in_rows = np.flatnonzero((x == pos[0]) & inner_rows)
+            in_cols = np.flatnonzero((y == pos[1]) & inner_cols)
+            if not (in_rows.size and in_cols.size):
+                continue
+            if deepest:
+                # the sprite resized for render_array, pixel k of the cell showing its pixel k-1
+                sprite = get_sprite(name, cell_px-1)
+                sprite_rows = np.floor(fx[in_rows]*cell_px).astype(np.intp) - 1
+                sprite_cols = np.floor(fy[in_cols]*cell_px).astype(np.intp) - 1
             else:
-                print('   ', end='')
-        print('+')
+                sprite = get_sprite(name)
+                sprite_rows = (fx[in_rows]*sprite.shape[0]).astype(np.intp)
+                sprite_cols = (fy[in_cols]*sprite.shape[1]).astype(np.intp)
+            tile[np.ix_(in_rows, in_cols)] = sprite[np.ix_(sprite_rows, sprite_cols)]
+        tile[dark & inside] = 0
+        tile[~inside] = 255
+        return tile
+
+    def iter_tiles(self, tile_px=256, cell_px=16, zooms=None):
+        """
+        Generates the tiles of the tile pyramid of the maze one at a time, rendering each on demand.
+
+        Parameters:
+        -----------
+        tile_px : int, optional
+            The size of a tile in pixels. Default is 256.
+        cell_px : int, optional
+            The size of a cell in pixels at the deepest level. Default is 16.
+        zooms : iterable of int, optional
+            The zoom levels to generate, all of them by default.
+
+        Yields:
+        -------
+        tuple
+            (z, tx, ty, tile) with tile the array returned by render_tile.
+        """
+        deepest = self.tile_zoom(tile_px, cell_px)
+        for z in (range(deepest+1) if zooms is None else zooms):
+            size = 2**(deepest - z) * tile_px
+            for tx in range(-(-self.col*cell_px // size)):
+                for ty in range(-(-self.lin*cell_px // size)):
+                    yield z, tx, ty, self.render_tile(z, tx, ty, tile_px, cell_px)
+
+    def write_tiles(self, directory, tile_px=256, cell_px=16, zooms=None):
+        """
+        Writes the tile pyramid of the maze as directory/z/x/y.png, one tile in memory at a time.
 
+        Parameters:
+        -----------
+        directory : str
+            The root directory of the pyramid.
+        tile_px : int, optional
+            The size of a tile in pixels. Default is 256.
+        cell_px : int, optional
+            The size of a cell in pixels at the deepest level. Default is 16.
+        zooms : iterable of int, optional
+            The zoom levels to write, all of them by default.
+        """
+        for z, tx, ty, tile in self.iter_tiles(tile_px, cell_px, zooms):
+            os.makedirs(os.path.join(directory, str(z), str(tx)), exist_ok=True)
+            write_png(os.path.join(directory, str(z), str(tx), f"{ty}.png"), tile)
 
-    def plot(self,directory):
+    def wall_runs(self):
+        """
+        Merges consecutive walls on the same grid line into runs.
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (horizontal, vertical): horizontal is a (n, 3) int array of runs (row, first column, last column + 1)
+            along the lines of h_walls, vertical a (m, 3) int array of runs (column, first row, last row + 1)
+            along the columns of v_walls.
+        """
+        runs = []
+        for edges in (self.h_walls, self.v_walls.T):
+            # +1 where a run starts, -1 just after it ends
+            steps = np.diff(np.pad(edges, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+            line, first = np.nonzero(steps == 1)
+            last = np.nonzero(steps == -1)[1]
+            runs.append(np.stack((line, first, last), axis=1))
+        return tuple(runs)
+
+    def to_svg(self, cell_size=20, stroke_width=1.5, sprite_dir=None):
+        """
+        Exports the maze as an SVG document.
+
+        The walls are a single <path>, where each horizontal or vertical run of walls (see wall_runs)
+        is one merged segment. The sprites are defined once in <defs> and placed with <use>.
+
+        Parameters:
+        -----------
+        cell_size : float, optional
+            The size of a cell in SVG user units. Default is 20.
+        stroke_width : float, optional
+            The width of the walls in SVG user units. Default is 1.5.
+        sprite_dir : str, optional
+            If given, sprites registered from an image file relative to render.IMAGE_DIR link to that file
+            under this URL or directory instead of being inlined as base64 data (see render.sprite_data_uri),
+            other sprites are still inlined.
+
+        Returns:
+        --------
+        str
+            The SVG document.
+        """
+        horizontal, vertical = self.wall_runs()
+        commands = [f"M{first*cell_size:g} {row*cell_size:g}H{last*cell_size:g}" for row, first, last in horizontal.tolist()]
+        commands += [f"M{column*cell_size:g} {first*cell_size:g}V{last*cell_size:g}" for column, first, last in vertical.tolist()]
+
+        margin = stroke_width
+        width, height = self.col*cell_size, self.lin*cell_size
+        svg = [f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+               f'viewBox="{-margin:g} {-margin:g} {width+2*margin:g} {height+2*margin:g}" '
+               f'width="{width+2*margin:g}" height="{height+2*margin:g}">']
+        special = [(pos, name) for pos, name in ((self.start_pos, 'start'), (self.finish_pos, 'finish'),
+                                                 (self.prize_pos, 'prize')) if pos is not None]
+        if special:
+            svg.append('<defs>')
+            for pos, name in special:
+                file = None if sprite_dir is None else sprite_file(name)
+                href = sprite_data_uri(name) if file is None else f"{sprite_dir}/{file}"
+                svg.append(f'<image id="{name}" width="{cell_size:g}" height="{cell_size:g}" '
+                           f'preserveAspectRatio="none" xlink:href="{href}"/>')
+            svg.append('</defs>')
+            for (x, y), name in special:
+                svg.append(f'<use xlink:href="#{name}" x="{y*cell_size:g}" y="{x*cell_size:g}"/>')
+        svg.append(f'<path d="{"".join(commands)}" fill="none" stroke="black" stroke-width="{stroke_width:g}" '
+                   f'stroke-linecap="square"/>')
+        svg.append('</svg>')
+        return '\n'.join(svg) + '\n'
+
+    def save_svg(self, path, **kwargs):
+        """
+        Writes the SVG export of the maze (see to_svg, which receives the keyword arguments) to a file.
+        """
+        with open(path, 'w') as file:
+            file.write(self.to_svg(**kwargs))
+
+    def plot(self,directory,sprite_px=None):
         """
         Plots the maze and saves the image to a given directory.
+
+        All the walls are drawn by a single LineCollection, and the sprites come from the process-wide
+        sprite cache of the render module (see render.register_sprite to use custom sprites).
         Parameters:
         -----------
         directory : str
             The directory where the image of the plotted maze will be saved.
+        sprite_px : int, optional
+            If given, sprites are pre-resized to this many pixels (and cached at that size) before plotting.
         """
-        img_folder = 'Image/'
+        # matplotlib is only loaded when a maze is actually plotted
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
 
         fig, ax = plt.subplots(figsize=(self.col, self.lin))
         ax.set_xlim(0,self.col)
         ax.set_ylim(0,self.lin)
 
-        for y in range(self.lin):
-            for x in range(self.col):
-                cell = self.cells[y][x]
-                if cell.walls['north']:
-                    ax.plot([x, x+1], [self.lin-y, self.lin-y], 'k-')
-                if cell.walls['south']:
-                    ax.plot([x, x+1], [self.lin-y-1, self.lin-y-1], 'k-')
-                if cell.walls['west']:
-                    ax.plot([x, x], [self.lin-y-1, self.lin-y], 'k-')
-                if cell.walls['east']:
-                    ax.plot([x+1, x+1], [self.lin-y-1, self.lin-y], 'k-')
-
-                if cell.start:
-                    start_img = mpimg.imread(img_folder + 'start.png')
-                    ax.imshow(start_img, extent=(x, x+1, self.lin-y-1, self.lin-y))
-                elif cell.finish:
-                    end_img = mpimg.imread(img_folder + 'exit.png')
-                    ax.imshow(end_img, extent=(x, x+1, self.lin-y-1, self.lin-y))
-                elif cell.prize:
-                    prize_img = mpimg.imread(img_folder + 'prize.jpg')
-                    ax.imshow(prize_img, extent=(x, x+1, self.lin-y-1, self.lin-y))
+        ax.add_collection(LineCollection(self.wall_segments(), colors='k', capstyle='projecting'))
+
+        for pos, name in ((self.start_pos, 'start'), (self.finish_pos, 'finish'), (self.prize_pos, 'prize')):
+            if pos is not None:
+                y, x = pos
+                ax.imshow(get_sprite(name, sprite_px), extent=(x, x+1, self.lin-y-1, self.lin-y))
 
         plt.axis('off')
         plt.savefig(directory,bbox_inches = 'tight',pad_inches = 0.1)
         plt.close()
 
-    def path_exists(self, start, goal):
+    def path_exists(self, start, goal, bidirectional=False):
         """Checks whether there is a path between the start cell and the goal cell in the maze using depth-first search (DFS).
+
+        Cells are marked in a visited bitmap indexed by x*col + y as soon as they are pushed, so each cell
+        is visited at most once and the search runs in O(V+E).
     
         Args:
-            start (tuple): A tuple representing the (row, column) coordinates of the start cell.
-        g   oal (tuple): A tuple representing the (row, column) coordinates of the goal cell.
+            start (Cell or tuple): The start cell, or its (row, column) coordinates.
+            goal (Cell or tuple): The goal cell, or its (row, column) coordinates.
+            bidirectional (bool): If True, run a breadth-first search from both ends instead, which stops
+                as soon as the two searches meet.
     
         Returns:
             bool: True if there is a path between the start cell and the goal cell, False otherwise.
         """
+        start = self.cell_index(start)
+        goal = self.cell_index(goal)
+        if start == goal:
+            return True
+        if bidirectional:
+            return self.bidirectional_path_exists(start, goal)
+        visited = bytearray(self.lin*self.col)
+        visited[start] = 1
         stack = [start]
-        visited = []
-        while len(stack)!=0:
-            current_cell = stack.pop()
-            if current_cell == goal:
-                return True
-            visited.append(current_cell)
-            for neighbor in self.get_visitable_neighbors(current_cell):
-                if neighbor not in visited:
+        while stack:
+            for neighbor in self.open_neighbors(stack.pop()):
+                if not visited[neighbor]:
+                    if neighbor == goal:
+                        return True
+                    visited[neighbor] = 1
                     stack.append(neighbor)
         return False
+
+    def bidirectional_path_exists(self, start, goal):
+        """Checks whether two cells are connected with a breadth-first search growing from both cells,
+        always expanding the smaller frontier.
+
+        Args:
+            start (int): The index x*col + y of the start cell.
+            goal (int): The index x*col + y of the goal cell.
+
+        Returns:
+            bool: True if there is a path between the start cell and the goal cell, False otherwise.
+        """
+        # 1 marks cells reached from start, 2 cells reached from goal
+        visited = bytearray(self.lin*self.col)
+        visited[start] = 1
+        visited[goal] = 2
+        frontiers = {1: [start], 2: [goal]}
+        while frontiers[1] and frontiers[2]:
+            side = 1 if len(frontiers[1]) <= len(frontiers[2]) else 2
+            layer = []
+            for cell in frontiers[side]:
+                for neighbor in self.open_neighbors(cell):
+                    if not visited[neighbor]:
+                        visited[neighbor] = side
+                        layer.append(neighbor)
+                    elif visited[neighbor] != side:
+                        return True
+            frontiers[side] = layer
+        return False
+
+    def cell_index(self, cell):
+        """Returns the flat index x*col + y of a Cell or of (row, column) coordinates."""
+        if isinstance(cell, Cell):
+            return cell.x*self.col + cell.y
+        return cell[0]*self.col + cell[1]
+
+    def open_neighbors(self, index):
+        """Returns the flat indices of the cells reachable in one move from the cell of flat index `index`."""
+        x, y = divmod(index, self.col)
+        neighbors = []
+        if x > 0 and not self.h_walls[x, y]:
+            neighbors.append(index - self.col)
+        if x < self.lin-1 and not self.h_walls[x+1, y]:
+            neighbors.append(index + self.col)
+        if y > 0 and not self.v_walls[x, y]:
+            neighbors.append(index - 1)
+        if y < self.col-1 and not self.v_walls[x, y+1]:
+            neighbors.append(index + 1)
+        return neighbors
     
     def is_valid(self):
         """Check if the maze is valid by verifying if there exists a path from start to finish cell, 
-        and a path from start to prize cell.
+        and a path from start to prize cell, using the connected components of the cells (see connected).
 
         Returns:
         --------
         bool:
             True if the maze is valid, False otherwise.
         """
-        return self.path_exists(self.start_cell,self.finish_cell) and self.path_exists(self.start_cell,self.prize_cell)
+        return self.connected(self.start_pos,self.finish_pos) and self.connected(self.start_pos,self.prize_pos)
 
     def get_visitable_neighbors(self, cell):
         """Returns a list of neighboring cells that can be visited from the given cell.
@@ -310,32 +1193,45 @@ class Maze:
 
         neighbors = []
         x, y = cell.x, cell.y
-        if x > 0 and not self.cells[x][y].walls['north']:
+        if x > 0 and not self.h_walls[x, y]:
             neighbors.append(self.get_cell(x-1, y))
-        if x < self.lin-1 and not self.cells[x][y].walls['south']:
+        if x < self.lin-1 and not self.h_walls[x+1, y]:
             neighbors.append(self.get_cell(x+1, y))
-        if y > 0 and not self.cells[x][y].walls['west']:
+        if y > 0 and not self.v_walls[x, y]:
             neighbors.append(self.get_cell(x, y-1))
-        if y < self.col-1 and not self.cells[x][y].walls['east']:
+        if y < self.col-1 and not self.v_walls[x, y+1]:
             neighbors.append(self.get_cell(x, y+1))
         return neighbors
 
-    def pave_random_maze(self):
-        """Randomly destroys walls between cells until a valid maze is generated."""
+    def pave_random_maze(self, rng=None):
+        """Randomly destroys walls between cells until a valid maze is generated.
+
+        The connectivity check relies on the union-find structure updated by destroy_wall, so each
+        iteration costs O(alpha(n)) instead of a full traversal.
+
+        Parameters:
+        -----------
+        rng : numpy.random.Generator, optional
+            The random generator to use, a fresh unseeded one by default."""
+        rng = np.random.default_rng(rng)
         while not (self.is_valid()):
             # Randomly select a cell in the maze
-            row = random.randint(0, self.lin-1)
-            col = random.randint(0, self.col-1)
-            cell = self.cells[row][col]
+            row = int(rng.integers(self.lin))
+            col = int(rng.integers(self.col))
+            cell = self.get_cell(row, col)
             # Randomly select a neighboring cell to destroy a wall between
             directions = ["north", "south", "east", "west"]
-            direction = random.choice(directions)
+            direction = directions[rng.integers(4)]
             self.destroy_wall(cell,direction)
 
 
-    def pave_qtable_aux(self,q,begin_cell,randomizer=0):
+    def pave_qtable_aux(self,q,begin_cell,randomizer=0,rng=None,max_steps=None):
         """Destroys walls between cells based on the given Q-table values and the target cell.
 
+        The walk runs on integer actions over precomputed move and wall tables, with its random draws
+        made in blocks. After max_steps steps, the remaining way to the start cell is paved greedily
+        (along the column, then along the line), so the cost of a walk is bounded.
+
         Parameters:
         -----------
         q : numpy.ndarray
@@ -344,53 +1240,59 @@ class Maze:
             The cell from which the paving begins.
         randomizer : float
             The probability of choosing a random action instead of the one with maximum Q-value.
+        rng : numpy.random.Generator, optional
+            The random generator to use, a fresh unseeded one by default.
+        max_steps : int, optional
+            The maximum number of steps of the walk, 4 times the number of cells by default.
 
         Returns:
         --------
         None
         """
-        #Destroy walls following q values and cell target
-        current_cell = begin_cell
-        target = self.start_cell
-        while current_cell != target:
-            x = current_cell.x
-            y = current_cell.y
-            q_xy = q[x,y]
-            #Process Values for choices with weighted probability
-            if np.random.uniform() < randomizer:
-                # q_xy = [np.max((0.0,e)) for e in q_xy]
-                # action = random.choices(['north', 'south', 'east', 'west'],weights=q_xy,k=1)[0]
-                action = random.choice(['north', 'south', 'east', 'west'])
-            else:
-                c = np.argmax(q_xy)
-                action = ['north', 'south', 'east', 'west'][c]
-            #Destroy the wall and observe the new cell
-            if action == 'north':
-                if x == 0:
-                    # invalid move
-                    continue
-                self.destroy_wall(current_cell,action)
-                current_cell = self.cells[x-1][y]
-            elif action == 'south':
-                if x == self.lin-1:
-                    # invalid move
-                    continue
-                self.destroy_wall(current_cell,action)
-                current_cell = self.cells[x+1][y]
-            elif action == 'east':
-                if y == self.col-1:
-                    # invalid move
-                    continue
-                self.destroy_wall(current_cell,action)
-                current_cell = self.cells[x][y+1]
-            elif action == 'west':
-                if y == 0:
+        greedy = np.argmax(q.reshape(-1, 4), axis=1).tolist()
+        self._pave_walk(greedy, self.cell_index(begin_cell), randomizer, np.random.default_rng(rng), max_steps)
+
+    def _pave_walk(self, greedy, state, randomizer, rng, max_steps):
+        """
+        Kernel of pave_qtable_aux, walking from the flat index `state` with the greedy action of each cell.
+        """
+        if max_steps is None:
+            max_steps = 4*self.lin*self.col
+        moves, edges = paving_tables(self.lin, self.col)
+        walls = self._walls
+        track = self._parent is not None
+        target = self.cell_index(self.start_pos)
+        steps = 0
+        while state != target and steps < max_steps:
+            # one uniform draw per step, rescaled to pick the random action when below randomizer
+            for u in rng.random(min(256, max_steps - steps)).tolist():
+                steps += 1
+                action = int(u/randomizer*4) if u < randomizer else greedy[state]
+                next_state = moves[state][action]
+                if next_state < 0:
                     # invalid move
                     continue
-                self.destroy_wall(current_cell,action)
-                current_cell = self.cells[x][y-1]
-    
-    def pave_qtable(self,q1,q2):
+                #Destroy the wall and observe the new cell
+                walls[edges[state][action]] = False
+                if track:
+                    self.union(state, next_state)
+                state = next_state
+                if state == target:
+                    break
+        # Greedy completion towards the start cell
+        while state != target:
+            x, y = divmod(state, self.col)
+            if x != target // self.col:
+                action = 0 if x > target // self.col else 1
+            else:
+                action = 3 if y > target % self.col else 2
+            next_state = moves[state][action]
+            walls[edges[state][action]] = False
+            if track:
+                self.union(state, next_state)
+            state = next_state
+
+    def pave_qtable(self,q1,q2,rng=None,max_steps=None):
         """Paves the maze based on the given Q-table values for the finish and prize cells, respectively.
 
         Parameters:
@@ -399,23 +1301,175 @@ class Maze:
             A Q-table representing the Q-values for each state-action pair with respect to the finish cell.
         q2 : numpy.ndarray
             A Q-table representing the Q-values for each state-action pair with respect to the prize cell.
+        rng : numpy.random.Generator, optional
+            The random generator to use, a fresh unseeded one by default.
+        max_steps : int, optional
+            The maximum number of steps of each walk before it is completed greedily (see pave_qtable_aux).
 
         Returns:
         --------
         None
         """
-        #Q1 for finish, Q2 for prize
-        self.pave_qtable_aux(q1,self.finish_cell,0.2)
-        self.pave_qtable_aux(q2,self.prize_cell,0.2)
+        rng = np.random.default_rng(rng)
+        #Q1 for finish, Q2 for prize, with their greedy actions computed once
+        greedy1 = np.argmax(q1.reshape(-1, 4), axis=1).tolist()
+        greedy2 = np.argmax(q2.reshape(-1, 4), axis=1).tolist()
+        self._pave_walk(greedy1,self.cell_index(self.finish_pos),0.2,rng,max_steps)
+        self._pave_walk(greedy2,self.cell_index(self.prize_pos),0.2,rng,max_steps)
         #Get randoms cells and add their path for creating dead-ends
         n_de = int(np.sqrt(self.lin*self.col))
+        edges = paving_tables(self.lin, self.col)[1]
+        special = {self.cell_index(pos) for pos in (self.start_pos, self.finish_pos, self.prize_pos)}
         for i in range(n_de):
             #The used Cell mustn't be a target cell
             found = False
             while not(found):
-                cell = self.cells[ random.randint(0, self.lin-1)][random.randint(0, self.col-1)]
-                found = not (cell.prize or cell.finish or cell.start) and (cell.walls['north'] or cell.walls['east'] or cell.walls['south'] or cell.walls['west'])
+                index = int(rng.integers(self.lin))*self.col + int(rng.integers(self.col))
+                found = index not in special and any(self._walls[edges[index]])
             if i % 2 ==0:
-                self.pave_qtable_aux(q1,cell,0.5)
+                self._pave_walk(greedy1,index,0.5,rng,max_steps)
             else:
-                self.pave_qtable_aux(q2,cell,0.5)
\ No newline at end of file
+                self._pave_walk(greedy2,index,0.5,rng,max_steps)
+
+    def pave_many(self, q1, q2, n, rng=None, max_steps=None):
+        """Paves n copies of the maze as pave_qtable does, advancing all their walks in lockstep.
+
+        No Maze is built: the walls of the n samples are rows of one boolean array, and every step of the
+        walks is a handful of NumPy operations over the samples still walking. The samples follow the same
+        distribution as pave_qtable but not the same random draws.
+
+        Parameters:
+        -----------
+        q1 : numpy.ndarray
+            A Q-table representing the Q-values for each state-action pair with respect to the finish cell.
+        q2 : numpy.ndarray
+            A Q-table representing the Q-values for each state-action pair with respect to the prize cell.
+        n : int
+            The number of mazes to pave.
+        rng : numpy.random.Generator, optional
+            The random generator to use, a fresh unseeded one by default.
+        max_steps : int, optional
+            The maximum number of steps of each walk before it is completed greedily (see pave_qtable_aux).
+
+        Returns:
+        --------
+        numpy.ndarray
+            A (n, lines, columns) uint8 array of wall bitmasks, as returned by wall_grid.
+        """
+        rng = np.random.default_rng(rng)
+        cells = self.lin*self.col
+        moves = transition_table(self.lin, self.col)
+        edges = edge_table(self.lin, self.col)
+        walls = np.ones((n, self._walls.size), dtype=bool)
+        greedy1 = np.argmax(q1.reshape(-1, 4), axis=1)
+        greedy2 = np.argmax(q2.reshape(-1, 4), axis=1)
+        self._pave_lockstep(walls, greedy1, np.full(n, self.cell_index(self.finish_pos)), 0.2, rng, max_steps,
+                            moves, edges)
+        self._pave_lockstep(walls, greedy2, np.full(n, self.cell_index(self.prize_pos)), 0.2, rng, max_steps,
+                            moves, edges)
+        #Dead-ends start from random cells, redrawn until they are not special and still have a wall
+        special = np.zeros(cells, dtype=bool)
+        special[[self.cell_index(pos) for pos in (self.start_pos, self.finish_pos, self.prize_pos)]] = True
+        for i in range(int(np.sqrt(cells))):
+            begin = np.empty(n, dtype=np.intp)
+            todo = np.arange(n)
+            while todo.size:
+                draw = rng.integers(cells, size=todo.size)
+                ok = ~special[draw] & walls[todo[:, None], edges[draw]].any(axis=1)
+                begin[todo[ok]] = draw[ok]
+                todo = todo[~ok]
+            self._pave_lockstep(walls, greedy1 if i % 2 == 0 else greedy2, begin, 0.5, rng, max_steps,
+                                moves, edges)
+        split = (self.lin+1)*self.col
+        return wall_bitmask(walls[:, :split].reshape(n, self.lin+1, self.col),
+                            walls[:, split:].reshape(n, self.lin, self.col+1))
+
+    def _pave_lockstep(self, walls, greedy, states, randomizer, rng, max_steps, moves, edges):
+        """
+        Kernel of pave_many, advancing one walk per row of `walls` from the flat indices `states` (modified in place).
+        """
+        if max_steps is None:
+            max_steps = 4*self.lin*self.col
+        target = self.cell_index(self.start_pos)
+        walking = np.flatnonzero(states != target)
+        for _ in range(max_steps):
+            if not walking.size:
+                return
+            state = states[walking]
+            u = rng.random(walking.size)
+            action = np.where(u < randomizer, (u/randomizer*4).astype(np.intp), greedy[state])
+            next_state = moves[state, action]
+            valid = next_state >= 0
+            walls[walking[valid], edges[state[valid], action[valid]]] = False
+            states[walking[valid]] = next_state[valid]
+            walking = walking[states[walking] != target]
+        # Greedy completion towards the start cell, at most lines + columns - 2 steps
+        tx, ty = divmod(target, self.col)
+        while walking.size:
+            x, y = np.divmod(states[walking], self.col)
+            action = np.where(x > tx, 0, np.where(x < tx, 1, np.where(y > ty, 3, 2)))
+            state = states[walking]
+            walls[walking, edges[state, action]] = False
+            states[walking] = moves[state, action]
+            walking = walking[states[walking] != target]
+
+# Figures kept open by plot_many, one per maze size: (figure, walls collection, sprite images by name, saved area)
+_figure_pool = {}
+
+def plot_many(mazes, paths, sprite_px=None):
+    """
+    Plots several mazes and saves each image to its path, like Maze.plot, reusing one figure per maze size.
+
+    The figure of a size is created on first use and kept for the lifetime of the process (so each
+    worker process has its own): between samples only the segments of the wall collection and the
+    data and extents of the sprite images are updated in place. The outer walls always span the whole
+    axes, so the tight bounding box saved around them is computed once per figure as well.
+
+    Parameters:
+    -----------
+    mazes : iterable of Maze
+        The mazes to plot.
+    paths : iterable of str
+        The path where the image of each maze is saved.
+    sprite_px : int, optional
+        If given, sprites are pre-resized to this many pixels (see Maze.plot).
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    for maze, path in zip(mazes, paths):
+        key = (maze.lin, maze.col)
+        if key not in _figure_pool:
+            fig, ax = plt.subplots(figsize=(maze.col, maze.lin))
+            ax.set_xlim(0,maze.col)
+            ax.set_ylim(0,maze.lin)
+            walls = ax.add_collection(LineCollection([], colors='k', capstyle='projecting'))
+            images = {name: ax.imshow(get_sprite(name, sprite_px), extent=(0, 1, 0, 1))
+                      for name in ('start', 'finish', 'prize')}
+            ax.axis('off')
+            walls.set_segments(maze.wall_segments())
+            saved_area = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+            _figure_pool[key] = (fig, walls, images, saved_area)
+        fig, walls, images, saved_area = _figure_pool[key]
+
+        walls.set_segments(maze.wall_segments())
+        for pos, name in ((maze.start_pos, 'start'), (maze.finish_pos, 'finish'), (maze.prize_pos, 'prize')):
+            image = images[name]
+            image.set_visible(pos is not None)
+            if pos is not None:
+                y, x = pos
+                image.set_data(get_sprite(name, sprite_px))
+                image.set_extent((x, x+1, maze.lin-y-1, maze.lin-y))
+        fig.savefig(path,bbox_inches = saved_area)
+
+def close_figures():
+    """
+    Closes the figures kept open by plot_many.
+    """
+    if not _figure_pool:
+        return
+    import matplotlib.pyplot as plt
+
+    for fig, walls, images, saved_area in _figure_pool.values():
+        plt.close(fig)
+    _figure_pool.clear()
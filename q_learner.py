@@ -1,7 +1,15 @@
-import random
+import time
+from collections import deque
 import numpy as np
 from maze import *
 
+def uniform_stream(rng, block_size=4096):
+    """
+    Yields uniform random numbers in [0, 1), drawn from the generator `rng` by blocks of `block_size`.
+    """
+    while True:
+        yield from rng.random(block_size).tolist()
+
 class QLearner:
     """
     A class for a Q-learning agent that learns to navigate a maze.
@@ -16,13 +24,33 @@ class QLearner:
         The discount factor of the agent. Default is 0.9.
     epsilon : float
         The exploration rate of the agent. Default is 0.3.
+    fast : bool
+        If True, learn_from_prize and learn_from_finish train with learn_fast. Default is False.
+    episodes : int
+        The maximum number of training episodes. Default is 2000.
+    tol : float or None
+        Training stops after an episode whose largest Q-value change is below tol. Default is None (disabled).
+    stable_episodes : int or None
+        Training stops once the greedy policy has not changed for this many consecutive episodes.
+        Default is None (disabled).
+    time_budget : float or None
+        Training stops after the episode during which this many seconds have elapsed. Default is None (no limit).
+    max_steps : int or None
+        The maximum number of steps (invalid moves included) of an episode, which is cut short if it
+        has not reached the goal by then. Default is None (no limit).
+    rng : numpy.random.Generator
+        The random generator driving exploration.
 
     q_table : numpy array
         A 3-dimensional numpy array that stores the Q-values for each state-action pair in the maze.
         The shape of the array is (maze.lin, maze.col, 4), where the last dimension represents the 4 possible
         actions: 'north', 'south', 'east', 'west'.
+    report : dict
+        Summary of the last training run: 'episodes' and 'steps' actually used, and the 'stop' reason
+        ('episodes', 'tol', 'stable' or 'time'). None before the first run.
     """
-    def __init__(self, maze, alpha=0.1, gamma=0.9, epsilon=0.3):
+    def __init__(self, maze, alpha=0.1, gamma=0.9, epsilon=0.3, fast=False, episodes=2000, tol=None,
+                 stable_episodes=None, time_budget=None, max_steps=None, rng=None):
         """
         Initializes a QLearner instance.
 
@@ -36,12 +64,36 @@ class QLearner:
             The discount factor of the agent. Default is 0.9.
         epsilon : float, optional
             The exploration rate of the agent. Default is 0.3.
+        fast : bool, optional
+            If True, learn_from_prize and learn_from_finish train with learn_fast. Default is False.
+        episodes : int, optional
+            The maximum number of training episodes. Default is 2000.
+        tol : float, optional
+            Stop after an episode whose largest Q-value change is below tol. Default is None (disabled).
+        stable_episodes : int, optional
+            Stop once the greedy policy is unchanged for this many consecutive episodes. Default is None (disabled).
+        time_budget : float, optional
+            Wall-clock budget of a training run in seconds. Default is None (no limit).
+        max_steps : int, optional
+            The maximum number of steps of an episode. Default is None (no limit).
+        rng : numpy.random.Generator, optional
+            The random generator driving exploration, a fresh unseeded one by default.
         """
+        if episodes < 0:
+            raise ValueError(f"The number of episodes must be non-negative: {episodes}")
         self.maze = maze
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        self.fast = fast
+        self.episodes = episodes
+        self.tol = tol
+        self.stable_episodes = stable_episodes
+        self.time_budget = time_budget
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(rng)
         self.q_table = np.zeros((self.maze.lin, self.maze.col, 4))
+        self.report = None
     
     def get_action(self, cell):
         """
@@ -57,9 +109,9 @@ class QLearner:
         str
             The action chosen by the agent. It can be one of the following strings: 'north', 'south', 'east', 'west'.
         """
-        if np.random.uniform() < self.epsilon:
+        if self.rng.random() < self.epsilon:
             # random action
-            return random.choice(['north', 'south', 'east', 'west'])
+            return ['north', 'south', 'east', 'west'][self.rng.integers(4)]
         else:
             # greedy action
             x = cell.x
@@ -70,8 +122,34 @@ class QLearner:
             for i in range(4):
                 if q_values[i] == max_q:
                     actions.append(i)
-            action_index = np.random.choice(actions)
+            action_index = self.rng.choice(actions)
             return ['north', 'south', 'east', 'west'][action_index]
+
+    def stop_reason(self, max_delta, stable_count, started):
+        """
+        Checks the stopping criteria at the end of an episode.
+
+        Parameters:
+        -----------
+        max_delta : float
+            The largest absolute Q-value change of the episode.
+        stable_count : int
+            The number of consecutive episodes without change of the greedy policy.
+        started : float
+            The time.perf_counter() value at the start of the training run.
+
+        Returns:
+        --------
+        str or None
+            The reason to stop ('tol', 'stable' or 'time'), or None to keep training.
+        """
+        if self.tol is not None and max_delta < self.tol:
+            return 'tol'
+        if self.stable_episodes is not None and stable_count >= self.stable_episodes:
+            return 'stable'
+        if self.time_budget is not None and time.perf_counter() - started >= self.time_budget:
+            return 'time'
+        return None
     
     def learn(self, start_cell, goal_cell, avoid_cell):
         """
@@ -89,12 +167,25 @@ class QLearner:
 
         Returns:
         --------
-        None
+        dict
+            The training report, also stored in `report`.
         """
+        started = time.perf_counter()
+        max_steps = self.max_steps if self.max_steps is not None else np.inf
+        steps = 0
+        stable_count = 0
+        reason = 'episodes'
+        completed = 0
+        # the greedy policy is only compared across updates when it can stop training
+        track_policy = self.stable_episodes is not None
         #Start learning
-        for episode in range(2000):
+        for episode in range(self.episodes):
             current_cell = start_cell
-            while current_cell != goal_cell:
+            episode_steps = 0
+            max_delta = 0.0
+            policy_changed = False
+            while current_cell != goal_cell and episode_steps < max_steps:
+                episode_steps += 1
                 # choose an action
                 action = self.get_action(current_cell)
                 x = current_cell.x
@@ -105,22 +196,22 @@ class QLearner:
                     if x == 0:
                         # invalid move
                         continue
-                    next_cell = self.maze.cells[x-1][y]
+                    next_cell = self.maze.get_cell(x-1, y)
                 elif action == 'south':
                     if x == self.maze.lin-1:
                         # invalid move
                         continue
-                    next_cell = self.maze.cells[x+1][y]
+                    next_cell = self.maze.get_cell(x+1, y)
                 elif action == 'east':
                     if y == self.maze.col-1:
                         # invalid move
                         continue
-                    next_cell = self.maze.cells[x][y+1]
+                    next_cell = self.maze.get_cell(x, y+1)
                 elif action == 'west':
                     if y == 0:
                         # invalid move
                         continue
-                    next_cell = self.maze.cells[x][y-1]
+                    next_cell = self.maze.get_cell(x, y-1)
                     
                 next_x = next_cell.x
                 next_y = next_cell.y
@@ -130,21 +221,142 @@ class QLearner:
                 if next_cell == avoid_cell:
                     reward = -1
                 # update Q table
+                if track_policy:
+                    old_policy = np.argmax(self.q_table[x, y])
                 old_q = self.q_table[x, y, ['north', 'south', 'east', 'west'].index(action)]
                 next_q = np.max(self.q_table[next_x, next_y])
                 new_q = (1 - self.alpha) * old_q + self.alpha * (reward + self.gamma * next_q)
                 self.q_table[x, y, ['north', 'south', 'east', 'west'].index(action)] = new_q
+                max_delta = max(max_delta, abs(new_q - old_q))
+                if track_policy and not policy_changed:
+                    policy_changed = np.argmax(self.q_table[x, y]) != old_policy
                 
                 # move to the next cell
                 current_cell = next_cell
 
+            steps += episode_steps
+            completed += 1
+            stable_count = 0 if policy_changed else stable_count + 1
+            stop = self.stop_reason(max_delta, stable_count, started)
+            if stop is not None:
+                reason = stop
+                break
+
+        self.report = {'episodes': completed, 'steps': steps, 'stop': reason}
+        return self.report
+
+    def learn_fast(self, start_cell, goal_cell, avoid_cell, block_size=4096):
+        """
+        Same training as `learn` (same episodes, exploration and rewards) on integer states and actions.
+
+        Moves are looked up in a precomputed transition table, the Q-table is updated as nested lists
+        and uniform random numbers are drawn by blocks of `block_size`, which removes the per-step
+        NumPy calls and string handling of `learn`. A single draw u per step decides between
+        exploration (u < epsilon) and exploitation, and rescaled it picks the random action or
+        breaks ties between greedy actions.
+
+        Parameters:
+        -----------
+        start_cell : Cell
+            The starting cell of the agent.
+        goal_cell : Cell
+            The goal cell of the agent.
+        avoid_cell : Cell
+            The cell that the agent must avoid.
+        block_size : int, optional
+            Number of uniform random numbers drawn at once. Default is 4096.
+
+        Returns:
+        --------
+        dict
+            The training report, also stored in `report`.
+        """
+        started = time.perf_counter()
+        col = self.maze.col
+        moves = transition_table(self.maze.lin, col).tolist()
+        q = self.q_table.reshape(-1, 4).tolist()
+        start = start_cell.x*col + start_cell.y
+        goal = goal_cell.x*col + goal_cell.y
+        avoid = avoid_cell.x*col + avoid_cell.y
+        alpha, gamma, epsilon = self.alpha, self.gamma, self.epsilon
+        keep = 1 - alpha
+        rewards = [0]*len(q)
+        rewards[goal] = 1
+        rewards[avoid] = -1
+        # best value of each state, kept up to date along with the table
+        best = [max(q_state) for q_state in q]
+        draw = uniform_stream(self.rng, block_size).__next__
+        max_steps = self.max_steps if self.max_steps is not None else np.inf
+        steps = 0
+        stable_count = 0
+        reason = 'episodes'
+        completed = 0
+        # the greedy policy is only compared across updates when it can stop training
+        track_policy = self.stable_episodes is not None
+
+        for episode in range(self.episodes):
+            state = start
+            episode_steps = 0
+            max_delta = 0.0
+            policy_changed = False
+            while state != goal and episode_steps < max_steps:
+                episode_steps += 1
+                # choose an action
+                q_state = q[state]
+                u = draw()
+                if u < epsilon:
+                    action = int(u/epsilon*4)
+                else:
+                    max_q = best[state]
+                    if q_state.count(max_q) == 1:
+                        action = q_state.index(max_q)
+                    else:
+                        actions = [i for i in range(4) if q_state[i] == max_q]
+                        action = actions[int((u-epsilon)/(1-epsilon)*len(actions))]
+
+                # take the action and observe the new state and reward
+                next_state = moves[state][action]
+                if next_state < 0:
+                    # invalid move
+                    continue
+                # update Q table
+                old_q = q_state[action]
+                if track_policy:
+                    old_policy = q_state.index(best[state])
+                new_q = keep*old_q + alpha*(rewards[next_state] + gamma*best[next_state])
+                q_state[action] = new_q
+                if new_q >= best[state]:
+                    best[state] = new_q
+                elif old_q == best[state]:
+                    best[state] = max(q_state)
+                if new_q - old_q > max_delta or old_q - new_q > max_delta:
+                    max_delta = abs(new_q - old_q)
+                if track_policy and not policy_changed and q_state.index(best[state]) != old_policy:
+                    policy_changed = True
+
+                # move to the next cell
+                state = next_state
+
+            steps += episode_steps
+            completed += 1
+            stable_count = 0 if policy_changed else stable_count + 1
+            stop = self.stop_reason(max_delta, stable_count, started)
+            if stop is not None:
+                reason = stop
+                break
+
+        self.q_table = np.array(q).reshape(self.q_table.shape)
+        self.report = {'episodes': completed, 'steps': steps, 'stop': reason}
+        return self.report
+
     def learn_from_prize(self):
         """
         This method initiates the Q-learning algorithm to find the optimal path from the prize cell to the start cell, 
         avoiding the finish cell. It calls the `learn` method with the `start_cell`, `prize_cell`, and `finish_cell` 
         as arguments.
         """
-        self.learn(self.maze.prize_cell,self.maze.start_cell,self.maze.finish_cell)
+        learn = self.learn_fast if self.fast else self.learn
+        return learn(self.maze.prize_cell,self.maze.start_cell,self.maze.finish_cell)
 
     def learn_from_finish(self):
         """
@@ -152,4 +364,263 @@ class QLearner:
         avoiding the prize cell. It calls the `learn` method with the `start_cell`, `finish_cell`, and `prize_cell` 
         as arguments.
         """
-        self.learn( self.maze.finish_cell,self.maze.start_cell,self.maze.prize_cell)
\ No newline at end of file
+        learn = self.learn_fast if self.fast else self.learn
+        return learn(self.maze.finish_cell,self.maze.start_cell,self.maze.prize_cell)
+
+class BatchQLearner:
+    """
+    Q-learning agents for a batch of same-sized mazes, trained in lockstep.
+
+    Each maze gets its own agent and its own Q-table, with its own start, goal and avoided cells.
+    All agents take one step per iteration through NumPy fancy indexing: an agent reaching its goal
+    starts its next episode right away, and is masked out once it has run all its episodes.
+
+    Attributes:
+    -----------
+    lin : int
+        The number of lines of the mazes.
+    col : int
+        The number of columns of the mazes.
+    alpha : float
+        The learning rate of the agents. Default is 0.1.
+    gamma : float
+        The discount factor of the agents. Default is 0.9.
+    epsilon : float
+        The exploration rate of the agents. Default is 0.3.
+    episodes : int
+        The number of episodes run by each agent. Default is 2000.
+    rng : numpy.random.Generator
+        The random generator driving exploration.
+
+    q_table : numpy array
+        A 4-dimensional numpy array of shape (B, lin, col, 4), q_table[i] is the Q-table learned for the i-th maze,
+        laid out like QLearner.q_table. None until `learn` is called.
+    """
+    def __init__(self, lines, columns, alpha=0.1, gamma=0.9, epsilon=0.3, episodes=2000, rng=None):
+        """
+        Initializes a BatchQLearner instance.
+
+        Parameters:
+        -----------
+        lines : int
+            The number of lines of the mazes.
+        columns : int
+            The number of columns of the mazes.
+        alpha : float, optional
+            The learning rate of the agents. Default is 0.1.
+        gamma : float, optional
+            The discount factor of the agents. Default is 0.9.
+        epsilon : float, optional
+            The exploration rate of the agents. Default is 0.3.
+        episodes : int, optional
+            The number of episodes run by each agent. Default is 2000.
+        rng : numpy.random.Generator, optional
+            The random generator driving exploration, a fresh unseeded one by default.
+        """
+        self.lin = lines
+        self.col = columns
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.episodes = episodes
+        self.rng = np.random.default_rng(rng)
+        self.q_table = None
+
+    def learn(self, starts, goals, avoids):
+        """
+        Trains one agent per maze to navigate from its starting cell to its goal cell while avoiding its avoid cell,
+        with the same rewards as QLearner.learn (+1 at the goal, -1 at the avoid cell, no update on invalid moves).
+
+        Parameters:
+        -----------
+        starts : array-like
+            A (B, 2) array with the (x, y) coordinates of the starting cell of each agent.
+        goals : array-like
+            A (B, 2) array with the (x, y) coordinates of the goal cell of each agent.
+        avoids : array-like
+            A (B, 2) array with the (x, y) coordinates of the cell each agent must avoid.
+
+        Returns:
+        --------
+        numpy array
+            The learned Q-tables, of shape (B, lin, col, 4).
+        """
+        # flat cell indices x*col + y
+        starts, goals, avoids = (np.asarray(cells)[:, 0]*self.col + np.asarray(cells)[:, 1]
+                                 for cells in (starts, goals, avoids))
+        batch = len(starts)
+        moves = transition_table(self.lin, self.col)
+        q = np.zeros((batch, self.lin*self.col, 4))
+        rewards = np.zeros((batch, self.lin*self.col))
+        rewards[np.arange(batch), goals] = 1
+        rewards[np.arange(batch), avoids] = -1
+
+        state = starts.copy()
+        episodes_left = np.full(batch, self.episodes)
+        active = np.flatnonzero((episodes_left > 0) & (starts != goals))
+        while active.size:
+            current = state[active]
+            q_current = q[active, current]
+            # choose an action, breaking ties between greedy actions at random
+            greedy = q_current == q_current.max(axis=1, keepdims=True)
+            pick = (self.rng.random(active.size)*greedy.sum(axis=1)).astype(int)
+            action = np.argmax(np.cumsum(greedy, axis=1) > pick[:, None], axis=1)
+            explore = self.rng.random(active.size) < self.epsilon
+            action[explore] = self.rng.integers(4, size=np.count_nonzero(explore))
+
+            # take the action, invalid moves leave the agent in place
+            next_state = moves[current, action]
+            valid = next_state >= 0
+            agents, current, action, next_state = active[valid], current[valid], action[valid], next_state[valid]
+            # update Q tables
+            target = rewards[agents, next_state] + self.gamma*q[agents, next_state].max(axis=1)
+            q[agents, current, action] = (1 - self.alpha)*q[agents, current, action] + self.alpha*target
+            state[agents] = next_state
+
+            # agents reaching their goal start a new episode, or stop once they have run them all
+            done = agents[next_state == goals[agents]]
+            episodes_left[done] -= 1
+            state[done] = starts[done]
+            active = active[episodes_left[active] > 0]
+
+        self.q_table = q.reshape(batch, self.lin, self.col, 4)
+        return self.q_table
+
+    def learn_from_prize(self, mazes):
+        """
+        Learns, for each maze, a path from the prize cell to the start cell avoiding the finish cell,
+        like QLearner.learn_from_prize.
+
+        Parameters:
+        -----------
+        mazes : list of Maze
+            Initialized mazes of size lin x col.
+
+        Returns:
+        --------
+        numpy array
+            The learned Q-tables, of shape (len(mazes), lin, col, 4).
+        """
+        return self.learn([maze.prize_pos for maze in mazes], [maze.start_pos for maze in mazes],
+                          [maze.finish_pos for maze in mazes])
+
+    def learn_from_finish(self, mazes):
+        """
+        Learns, for each maze, a path from the finish cell to the start cell avoiding the prize cell,
+        like QLearner.learn_from_finish.
+
+        Parameters:
+        -----------
+        mazes : list of Maze
+            Initialized mazes of size lin x col.
+
+        Returns:
+        --------
+        numpy array
+            The learned Q-tables, of shape (len(mazes), lin, col, 4).
+        """
+        return self.learn([maze.finish_pos for maze in mazes], [maze.start_pos for maze in mazes],
+                          [maze.prize_pos for maze in mazes])
+
+
+class DistanceFieldLearner:
+    """
+    An exact alternative to QLearner, computing the Q-table from breadth-first search distances on the grid.
+
+    The Q-values are those of the optimal policy for the rewards used by QLearner (+1 when reaching the goal,
+    -1 when stepping on the avoided cell, discount gamma): a move leading to a cell at distance d of the goal
+    is worth gamma**d. They are computed in O(lin*col) time, without running any episode. Moves leaving the
+    grid are given a value of -inf so that they are never the greedy action.
+
+    Attributes:
+    -----------
+    maze : Maze
+        The maze that the agent navigates.
+    gamma : float
+        The discount factor of the agent. Default is 0.9.
+
+    q_table : numpy array
+        A 3-dimensional numpy array that stores the Q-values for each state-action pair in the maze,
+        with the same (maze.lin, maze.col, 4) layout as QLearner.q_table.
+    """
+    def __init__(self, maze, gamma=0.9):
+        """
+        Initializes a DistanceFieldLearner instance.
+
+        Parameters:
+        -----------
+        maze : Maze
+            The maze that the agent navigates.
+        gamma : float, optional
+            The discount factor of the agent. Default is 0.9.
+        """
+        self.maze = maze
+        self.gamma = gamma
+        self.q_table = np.zeros((self.maze.lin, self.maze.col, 4))
+
+    def learn(self, start_cell, goal_cell, avoid_cell):
+        """
+        Computes the Q-table leading from any cell to the goal cell while avoiding the avoid_cell.
+
+        Parameters:
+        -----------
+        start_cell : Cell
+            The starting cell of the agent (every cell gets its values, it is kept for interface compatibility).
+        goal_cell : Cell
+            The goal cell of the agent.
+        avoid_cell : Cell
+            The cell that the agent must avoid.
+
+        Returns:
+        --------
+        None
+        """
+        col = self.maze.col
+        moves = transition_table(self.maze.lin, col)
+        neighbors = moves.tolist()
+        goal = goal_cell.x*col + goal_cell.y
+        avoid = avoid_cell.x*col + avoid_cell.y
+
+        # Breadth-first search from the goal, the avoided cell is only crossed to reach cells cut off by it
+        distance = [-1]*len(neighbors)
+        distance[goal] = 0
+        order = [goal]
+        queue = deque(order)
+        postponed = []
+        while queue or postponed:
+            if not queue:
+                queue.extend(postponed)
+                postponed = []
+            cell = queue.popleft()
+            for neighbor in neighbors[cell]:
+                if neighbor >= 0 and distance[neighbor] < 0:
+                    distance[neighbor] = distance[cell] + 1
+                    order.append(neighbor)
+                    if neighbor == avoid:
+                        postponed.append(neighbor)
+                    else:
+                        queue.append(neighbor)
+
+        # Bellman backup in order of discovery, each cell only depends on cells found before it
+        rewards = np.zeros(len(neighbors))
+        rewards[goal] = 1
+        rewards[avoid] = -1
+        value = np.zeros(len(neighbors))
+        for cell in order[1:]:
+            value[cell] = max(rewards[neighbor] + self.gamma*value[neighbor] for neighbor in neighbors[cell]
+                              if neighbor >= 0 and distance[neighbor] < distance[cell])
+
+        q = np.where(moves >= 0, rewards[moves] + self.gamma*value[moves], -np.inf)
+        self.q_table = q.reshape(self.q_table.shape)
+
+    def learn_from_prize(self):
+        """
+        Computes the Q-table leading from the prize cell to the start cell, avoiding the finish cell.
+        """
+        self.learn(self.maze.prize_cell,self.maze.start_cell,self.maze.finish_cell)
+
+    def learn_from_finish(self):
+        """
+        Computes the Q-table leading from the finish cell to the start cell, avoiding the prize cell.
+        """
+        self.learn(self.maze.finish_cell,self.maze.start_cell,self.maze.prize_cell)
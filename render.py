@@ -0,0 +1,209 @@
+import base64
+import os
+import struct
+import zlib
+import numpy as np
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Image')
+
+def load_sprite(path):
+    """
+    Decodes an image file into an RGB uint8 array, compositing any transparency over a white background.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the image file.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (height, width, 3) uint8 array.
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        rgba = np.asarray(image.convert('RGBA'), dtype=np.float32)
+    alpha = rgba[..., 3:] / 255
+    return np.round(rgba[..., :3]*alpha + 255*(1 - alpha)).astype(np.uint8)
+
+def resize_nearest(image, height, width):
+    """
+    Resizes an image array with nearest-neighbour sampling.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        A (h, w, ...) array.
+    height : int
+        The height of the resized image.
+    width : int
+        The width of the resized image.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (height, width, ...) array.
+    """
+    rows = (np.arange(height)*image.shape[0]) // height
+    cols = (np.arange(width)*image.shape[1]) // width
+    return image[rows[:, None], cols]
+
+# Sprite files drawn on the special cells, relative to IMAGE_DIR
+SPRITE_FILES = {'start': 'start.png', 'finish': 'exit.png', 'prize': 'prize.jpg'}
+
+# Registered sprite sources (file paths or arrays), and decoded sprites keyed by (name, size)
+_sprite_sources = dict(SPRITE_FILES)
+_sprite_cache = {}
+
+def register_sprite(name, source):
+    """
+    Registers the sprite drawn for a special cell, replacing the current one.
+
+    Parameters:
+    -----------
+    name : str
+        The sprite name, 'start', 'finish' and 'prize' are used by Maze.
+    source : str or numpy.ndarray
+        An image file (absolute, or relative to IMAGE_DIR) or an already decoded (h, w, 3) uint8 array.
+    """
+    _sprite_sources[name] = source
+    for key in [key for key in _sprite_cache if key[0] == name]:
+        del _sprite_cache[key]
+
+def reset_sprites():
+    """
+    Restores the default sprites and empties the sprite cache.
+    """
+    _sprite_sources.clear()
+    _sprite_sources.update(SPRITE_FILES)
+    _sprite_cache.clear()
+
+def get_sprite(name, size=None):
+    """
+    Returns a registered sprite as an RGB uint8 array, decoded once per process.
+
+    Parameters:
+    -----------
+    name : str
+        The sprite name ('start', 'finish', 'prize' or a registered name).
+    size : int, optional
+        If given, the sprite is resized to (size, size) pixels and the resized array is cached as well.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A (height, width, 3) uint8 array, to be treated as read-only.
+    """
+    key = (name, size)
+    if key not in _sprite_cache:
+        if size is not None:
+            _sprite_cache[key] = resize_nearest(get_sprite(name), size, size)
+        else:
+            source = _sprite_sources[name]
+            if isinstance(source, str):
+                source = load_sprite(os.path.join(IMAGE_DIR, source))
+            _sprite_cache[key] = np.asarray(source, dtype=np.uint8)
+    return _sprite_cache[key]
+
+def sprite_file(name):
+    """
+    Returns the image file of a registered sprite relative to IMAGE_DIR, or None if the sprite was registered
+    as an array or from an absolute path.
+    """
+    source = _sprite_sources[name]
+    if isinstance(source, str) and not os.path.isabs(source):
+        return source
+    return None
+
+def sprite_data_uri(name):
+    """
+    Returns a registered sprite as a base64 data URI, to be inlined in SVG files.
+
+    Sprites registered from a file keep their original encoding, sprites registered as arrays are encoded as PNG.
+    """
+    key = (name, 'uri')
+    if key not in _sprite_cache:
+        source = _sprite_sources[name]
+        if isinstance(source, str):
+            with open(os.path.join(IMAGE_DIR, source), 'rb') as file:
+                data = file.read()
+            mime = 'image/jpeg' if source.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
+        else:
+            data = encode_png(source)
+            mime = 'image/png'
+        _sprite_cache[key] = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+    return _sprite_cache[key]
+
+def encode_png(image, level=6):
+    """
+    Encodes a uint8 grayscale (h, w) or RGB (h, w, 3) array as PNG.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        The image to encode.
+    level : int, optional
+        The zlib compression level. Default is 6.
+
+    Returns:
+    --------
+    bytes
+        The content of the PNG file.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    color_type = 2 if image.ndim == 3 else 0
+    # every scanline starts with its filter type, 0 (none)
+    raw = np.zeros((height, 1 + image[0].size), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), level))
+            + chunk(b'IEND', b''))
+
+def write_png(path, image, level=6):
+    """
+    Writes a uint8 grayscale (h, w) or RGB (h, w, 3) array as a PNG file.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the file to write.
+    image : numpy.ndarray
+        The image to write.
+    level : int, optional
+        The zlib compression level. Default is 6.
+    """
+    with open(path, 'wb') as file:
+        file.write(encode_png(image, level))
+
+def write_ppm(path, image):
+    """
+    Writes a uint8 RGB (h, w, 3) array as a binary PPM (P6) file.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the file to write.
+    image : numpy.ndarray
+        The image to write.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    with open(path, 'wb') as file:
+        file.write(b'P6\n%d %d\n255\n' % (width, height))
+        file.write(image.tobytes())
+
+def write_image(path, image):
+    """
+    Writes an image array as PNG or PPM depending on the extension of `path`.
+    """
+    if path.lower().endswith(('.ppm', '.pnm')):
+        write_ppm(path, image)
+    else:
+        write_png(path, image)
@@ -0,0 +1,131 @@
+"""
+Round-trip tests of the binary maze format (Maze.to_bytes, Maze.from_bytes) and of the container files
+of dataset.py. Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+from maze import Maze
+from dataset import (MazeDataset, load_records, load_wall_grids, read_mazes, record_size, write_mazes,
+                     write_wall_grids)
+
+def random_maze(lines, columns, seed, index=None):
+    """Returns a randomly paved maze with its special cells, seed and index set."""
+    rng = np.random.default_rng(seed)
+    maze = Maze(lines, columns)
+    maze.init_maze(rng)
+    maze.pave_random_maze(rng)
+    maze.seed = seed
+    maze.index = index
+    return maze
+
+def assert_same_maze(a, b):
+    """Checks that two mazes have the same size, walls, special cells, seed and index."""
+    assert (a.lin, a.col) == (b.lin, b.col)
+    np.testing.assert_array_equal(a.h_walls, b.h_walls)
+    np.testing.assert_array_equal(a.v_walls, b.v_walls)
+    assert (a.start_pos, a.finish_pos, a.prize_pos) == (b.start_pos, b.finish_pos, b.prize_pos)
+    assert (a.seed, a.index) == (b.seed, b.index)
+
+class MazeBytesTest(unittest.TestCase):
+    def test_round_trip(self):
+        maze = random_maze(10, 8, seed=3, index=7)
+        data = maze.to_bytes()
+        self.assertEqual(len(data), record_size(10, 8))
+        assert_same_maze(Maze.from_bytes(data), maze)
+
+    def test_odd_cell_count(self):
+        maze = random_maze(3, 5, seed=4, index=0)
+        data = maze.to_bytes()
+        self.assertEqual(len(data), record_size(3, 5))
+        # the high nibble after the last cell is zero
+        self.assertEqual(data[-1] >> 4, 0)
+        assert_same_maze(Maze.from_bytes(data), maze)
+
+    def test_missing_seed_and_special_cells(self):
+        maze = Maze(2, 3)
+        copy = Maze.from_bytes(maze.to_bytes())
+        assert_same_maze(copy, maze)
+        self.assertIsNone(copy.seed)
+        self.assertIsNone(copy.start_pos)
+
+    def test_out_of_range_seed(self):
+        maze = Maze(2, 2)
+        maze.seed = 2**32
+        with self.assertRaises(ValueError):
+            maze.to_bytes()
+
+class ContainerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'mazes.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_read_mazes(self):
+        mazes = [random_maze(5, 7, seed=1, index=i) for i in range(6)]
+        self.assertEqual(write_mazes(self.path, iter(mazes)), 6)
+        for copy, maze in zip(read_mazes(self.path), mazes):
+            assert_same_maze(copy, maze)
+        self.assertEqual(len(list(read_mazes(self.path))), 6)
+
+    def test_mixed_sizes_are_read_one_by_one(self):
+        mazes = [random_maze(lines, 4, seed=lines) for lines in (3, 2, 4)]
+        write_mazes(self.path, mazes)
+        self.assertEqual([(maze.lin, maze.col) for maze in read_mazes(self.path)], [(3, 4), (2, 4), (4, 4)])
+
+    def test_empty_container(self):
+        write_mazes(self.path, [])
+        self.assertEqual(list(read_mazes(self.path)), [])
+        self.assertEqual(len(MazeDataset(self.path)), 0)
+        self.assertEqual(len(load_wall_grids(self.path)), 0)
+
+    def test_wall_grids(self):
+        template = random_maze(5, 7, seed=2)
+        grids = np.stack([random_maze(5, 7, seed=10+i).wall_grid for i in range(9)])
+        write_wall_grids(self.path, template, grids, start=100)
+        np.testing.assert_array_equal(load_wall_grids(self.path), grids)
+
+        dataset = MazeDataset(self.path)
+        self.assertEqual(len(dataset), 9)
+        np.testing.assert_array_equal(dataset.walls(slice(None)), grids)
+        np.testing.assert_array_equal(dataset.walls(4), grids[4])
+        np.testing.assert_array_equal(dataset.walls([8, 0, 3]), grids[[8, 0, 3]])
+        maze = dataset.maze(4)
+        np.testing.assert_array_equal(maze.wall_grid, grids[4])
+        self.assertEqual((maze.seed, maze.index, maze.prize_pos), (2, 104, template.prize_pos))
+
+    def test_dataset_pickle(self):
+        template = random_maze(4, 4, seed=5)
+        grids = np.stack([random_maze(4, 4, seed=i).wall_grid for i in range(50)])
+        write_wall_grids(self.path, template, grids)
+        dataset = MazeDataset(self.path)
+        data = pickle.dumps(dataset)
+        self.assertLess(len(data), grids.nbytes)
+        np.testing.assert_array_equal(pickle.loads(data).walls(slice(None)), grids)
+
+    def test_mixed_size_container_is_rejected(self):
+        # 30 + 28 + 32 bytes, the same total as three 3x4 records
+        write_mazes(self.path, [random_maze(lines, 4, seed=lines) for lines in (3, 2, 4)])
+        with self.assertRaises(ValueError):
+            MazeDataset(self.path)
+        with self.assertRaises(ValueError):
+            load_records(self.path)
+
+    def test_mixed_shape_container_is_rejected(self):
+        # records of the same size, the 6x4 one decoded as 4x6 would be wrong
+        write_mazes(self.path, [random_maze(*shape, seed=i) for i, shape in enumerate(((4, 6), (6, 4), (4, 6)))])
+        with self.assertRaises(ValueError):
+            load_records(self.path)
+        dataset = MazeDataset(self.path)
+        self.assertEqual(dataset.walls(0).shape, (4, 6))
+        for index in (1, slice(None), [0, 1]):
+            with self.assertRaises(ValueError):
+                dataset.walls(index)
+        self.assertEqual(dataset.maze(1).wall_grid.shape, (6, 4))
+
+if __name__ == "__main__":
+    unittest.main()